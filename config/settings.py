@@ -42,6 +42,50 @@ EMAIL_USE_TLS = True if os.getenv("EMAIL_USE_TLS") == "True" else False
 EMAIL_USE_SSL = True if os.getenv("EMAIL_USE_SSL") == "True" else False
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+EMAIL_MAX_MESSAGES_PER_CONNECTION = int(
+    os.getenv("EMAIL_MAX_MESSAGES_PER_CONNECTION", default="100")
+)
+EMAIL_ASYNC_CONCURRENCY = int(os.getenv("EMAIL_ASYNC_CONCURRENCY", default="100"))
+
+ATTEMPT_LOG_BATCH_SIZE = int(os.getenv("ATTEMPT_LOG_BATCH_SIZE", default="1000"))
+ATTEMPT_LOG_FLUSH_INTERVAL = float(
+    os.getenv("ATTEMPT_LOG_FLUSH_INTERVAL", default="5")
+)
+ATTEMPT_LOG_RETENTION_DAYS = int(os.getenv("ATTEMPT_LOG_RETENTION_DAYS", default="90"))
+ATTEMPT_LOG_ARCHIVE_DIR = os.getenv(
+    "ATTEMPT_LOG_ARCHIVE_DIR", default=str(BASE_DIR / "archive")
+)
+ATTEMPT_LOG_ARCHIVE_BATCH_SIZE = int(
+    os.getenv("ATTEMPT_LOG_ARCHIVE_BATCH_SIZE", default="500")
+)
+
+RECIPIENT_CHUNK_SIZE = int(os.getenv("RECIPIENT_CHUNK_SIZE", default="2000"))
+
+CLIENT_IMPORT_BATCH_SIZE = int(os.getenv("CLIENT_IMPORT_BATCH_SIZE", default="2000"))
+CLIENT_IMPORT_REJECTED_DIR = os.getenv(
+    "CLIENT_IMPORT_REJECTED_DIR", default=str(BASE_DIR / "imports")
+)
+CLIENT_IMPORT_REJECTED_RETENTION_HOURS = int(
+    os.getenv("CLIENT_IMPORT_REJECTED_RETENTION_HOURS", default="24")
+)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", default="2000"))
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", default="50"))
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", default="100"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", default="300"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", default="5"))
+OUTBOX_RETRY_BASE_DELAY = int(os.getenv("OUTBOX_RETRY_BASE_DELAY", default="60"))
+OUTBOX_RETRY_MAX_DELAY = int(os.getenv("OUTBOX_RETRY_MAX_DELAY", default="3600"))
+
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv("EMAIL_QUEUE_BATCH_SIZE", default="20"))
+EMAIL_QUEUE_LEASE_SECONDS = int(os.getenv("EMAIL_QUEUE_LEASE_SECONDS", default="60"))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv("EMAIL_QUEUE_MAX_ATTEMPTS", default="8"))
+EMAIL_QUEUE_RETRY_BASE_DELAY = int(
+    os.getenv("EMAIL_QUEUE_RETRY_BASE_DELAY", default="10")
+)
+EMAIL_QUEUE_RETRY_MAX_DELAY = int(
+    os.getenv("EMAIL_QUEUE_RETRY_MAX_DELAY", default="600")
+)
 
 
 MIDDLEWARE = [
@@ -143,6 +187,8 @@ LOGOUT_REDIRECT_URL = "/"
 LOGIN_URL = "users:login"
 
 CACHE_ENABLED = True
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", default="300"))
+DETAIL_CACHE_TIMEOUT = int(os.getenv("DETAIL_CACHE_TIMEOUT", default="900"))
 if CACHE_ENABLED:
     CACHES = {
         "default": {
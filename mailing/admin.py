@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Client, Mailing, Message
+from .models import (Client, Mailing, MailingDailyStats, Message, QueuedEmail,
+                     Segment)
 
 
 @admin.register(Client)
@@ -33,3 +34,24 @@ class MailingAdmin(admin.ModelAdmin):
         "status_mail",
         "owner",
     )
+
+
+@admin.register(MailingDailyStats)
+class MailingDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ("mailing", "day", "sent", "failed")
+    list_filter = ("day",)
+    list_select_related = ("mailing",)
+
+
+@admin.register(Segment)
+class SegmentAdmin(admin.ModelAdmin):
+    list_display = ("title", "email_domain", "comment_contains", "owner")
+    search_fields = ("title",)
+    list_filter = ("owner",)
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ("to", "subject", "state", "attempts", "created_at")
+    search_fields = ("to",)
+    list_filter = ("state",)
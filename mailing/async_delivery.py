@@ -0,0 +1,192 @@
+import asyncio
+import time
+
+import aiosmtplib
+from asgiref.sync import sync_to_async
+
+from config.settings import (EMAIL_ASYNC_CONCURRENCY, EMAIL_HOST,
+                             EMAIL_HOST_PASSWORD, EMAIL_HOST_USER,
+                             EMAIL_MAX_MESSAGES_PER_CONNECTION, EMAIL_PORT,
+                             EMAIL_USE_SSL, EMAIL_USE_TLS)
+from mailing.models import Message
+from mailing.services import (AttemptLogWriter, DeliveryReport, build_email,
+                              is_transient_error, make_attempt, save_attempts,
+                              schedule_retry)
+
+
+class AsyncMailConnection:
+    """Асинхронный аналог MailConnection поверх aiosmtplib"""
+
+    def __init__(
+        self,
+        hostname=EMAIL_HOST,
+        port=EMAIL_PORT,
+        max_messages=EMAIL_MAX_MESSAGES_PER_CONNECTION,
+        username=EMAIL_HOST_USER,
+        password=EMAIL_HOST_PASSWORD,
+        use_tls=EMAIL_USE_SSL,
+        start_tls=EMAIL_USE_TLS,
+    ):
+        self.hostname = hostname
+        self.port = int(port) if port else None
+        self.max_messages = max_messages
+        self.username = username or None
+        self.password = password or None
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.smtp = None
+        self.sent_count = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def open(self):
+        self.smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+        )
+        await self.smtp.connect()
+        self.sent_count = 0
+
+    async def close(self):
+        if self.smtp is None:
+            return
+        try:
+            await self.smtp.quit()
+        except aiosmtplib.SMTPException:
+            self.smtp.close()
+        finally:
+            self.smtp = None
+
+    async def reconnect(self):
+        await self.close()
+        await self.open()
+
+    async def send(self, message):
+        """Отправляет письмо (EmailMessage), возвращает число отправленных писем"""
+        if self.smtp is None:
+            await self.open()
+        elif self.max_messages and self.sent_count >= self.max_messages:
+            await self.reconnect()
+        content = message.message().as_bytes(linesep="\r\n")
+        try:
+            await self.smtp.sendmail(message.from_email, message.recipients(), content)
+        except aiosmtplib.SMTPServerDisconnected:
+            await self.reconnect()
+            await self.smtp.sendmail(message.from_email, message.recipients(), content)
+        self.sent_count += 1
+        return 1
+
+
+def is_transient_async_error(error):
+    """is_transient_error для исключений aiosmtplib"""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(400 <= refused.code < 500 for refused in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return 400 <= error.code < 500
+    if isinstance(error, aiosmtplib.SMTPException) and not isinstance(error, OSError):
+        return False
+    return is_transient_error(error)
+
+
+async def _arecord_attempt(mailing, client, mail_response, log_writer):
+    if mail_response != 1 and is_transient_async_error(mail_response):
+        await sync_to_async(schedule_retry)(mailing, client, mail_response)
+
+    attempt = make_attempt(mailing, client, mail_response)
+    if log_writer is not None:
+        await log_writer.aadd(attempt)
+    else:
+        await sync_to_async(save_attempts)([attempt])
+    return attempt
+
+
+async def _atimed_send(mailing, client, connection, log_writer):
+    """Отправка с замером задержки только SMTP-диалога, без записи журнала"""
+    message = build_email(mailing, client)
+    started = time.perf_counter()
+    try:
+        mail_response = await connection.send(message)
+    except Exception as e:
+        mail_response = e
+    latency = time.perf_counter() - started
+    attempt = await _arecord_attempt(mailing, client, mail_response, log_writer)
+    return attempt, latency
+
+
+async def asend_email(mailing, client, connection, log_writer=None):
+    """Асинхронная отправка письма клиенту и запись попытки в журнал.
+
+    Письмо с временной ошибкой ставится на повтор (см. schedule_retry).
+    """
+    attempt, _ = await _atimed_send(mailing, client, connection, log_writer)
+    return attempt
+
+
+async def _async_worker(mailing, tasks, report, log_writer, connection_factory):
+    async with connection_factory() as connection:
+        while (task := await tasks.get()) is not None:
+            index, client = task
+            report.add(
+                index,
+                client,
+                *await _atimed_send(mailing, client, connection, log_writer),
+            )
+
+
+async def asend_mailing(
+    mailing,
+    clients,
+    concurrency=EMAIL_ASYNC_CONCURRENCY,
+    connection_factory=AsyncMailConnection,
+    on_result=None,
+):
+    """Асинхронная отправка рассылки.
+
+    Одновременно ведется не более concurrency SMTP-диалогов: каждый из
+    concurrency обработчиков держит своё соединение и берет получателей из
+    общей ограниченной очереди. clients может быть обычным или асинхронным
+    итерируемым (например, QuerySet). Результат по каждому получателю
+    передается в on_result(email, status) в порядке clients. Возвращает
+    DeliveryReport.
+    """
+    report = DeliveryReport(on_result)
+    mailing.message = await Message.objects.aget(pk=mailing.message_id)
+    tasks = asyncio.Queue(maxsize=concurrency * 2)
+    log_writer = AttemptLogWriter()
+    workers = [
+        asyncio.create_task(
+            _async_worker(mailing, tasks, report, log_writer, connection_factory)
+        )
+        for _ in range(concurrency)
+    ]
+
+    async def produce():
+        index = 0
+        if hasattr(clients, "__aiter__"):
+            async for client in clients:
+                await tasks.put((index, client))
+                report.emit()
+                index += 1
+        else:
+            for index, client in enumerate(clients):
+                await tasks.put((index, client))
+                report.emit()
+        for _ in workers:
+            await tasks.put(None)
+
+    producer = asyncio.create_task(produce())
+    async with log_writer:
+        try:
+            await asyncio.gather(producer, *workers)
+        finally:
+            for task in (producer, *workers):
+                task.cancel()
+    return report.finish()
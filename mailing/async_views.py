@@ -0,0 +1,168 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404, render
+from django.views import View
+
+from config.settings import DETAIL_CACHE_TIMEOUT, LIST_PAGE_SIZE
+from mailing.services import aget_dashboard_counters, aget_mailing_stats
+from users.services import aget_user_roles, is_manager
+
+from .models import Client, Mailing, Message, Segment
+from .views import VersionedCacheMixin
+
+
+async def aget_request_user(request):
+    """Пользователь запроса вместе с ролями, загруженными асинхронно.
+
+    Пользователь подставляется в request.user, чтобы шаблон и проверки ролей
+    брали уже загруженный объект и не ходили в БД повторно.
+    """
+    user = await request.auser()
+    await aget_user_roles(user)
+    request.user = user
+    return user
+
+
+async def arender(request, template_name, context):
+    """Рисует шаблон в потоке: теги и контекстные процессоры (perms, has_group)
+    обращаются к БД синхронно"""
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def apaginate(queryset, page_number, per_page):
+    """Страница выборки; количество и строки читаются асинхронным ORM"""
+    paginator = Paginator(queryset, per_page)
+    paginator.count = await queryset.acount()
+    try:
+        page = paginator.page(page_number or 1)
+    except InvalidPage:
+        raise Http404
+    page.object_list = [obj async for obj in page.object_list]
+    return page
+
+
+class AsyncHomeView(View):
+    """Асинхронный вариант HomeView"""
+
+    async def get(self, request):
+        user = await aget_request_user(request)
+        context = {}
+        if user.is_authenticated:
+            owner_id = None if is_manager(user) else user.id
+            context.update(await aget_dashboard_counters(owner_id))
+        return await arender(request, "mailing/home.html", context)
+
+
+class AsyncOwnedListView(View):
+    """Асинхронный вариант OwnedListView: тот же шаблон и та же выборка for_list"""
+
+    model = None
+    template_name = None
+    context_object_name = None
+    paginate_by = LIST_PAGE_SIZE
+
+    async def get(self, request):
+        user = await aget_request_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        page = await apaginate(
+            self.model.objects.for_list(user),
+            request.GET.get("page"),
+            self.paginate_by,
+        )
+        context = {
+            self.context_object_name: page.object_list,
+            "object_list": page.object_list,
+            "page_obj": page,
+            "paginator": page.paginator,
+            "is_paginated": page.has_other_pages(),
+        }
+        return await arender(request, self.template_name, context)
+
+
+class AsyncOwnedDetailView(VersionedCacheMixin, View):
+    """Асинхронный вариант страницы объекта с тем же кешем по версиям"""
+
+    model = None
+    template_name = None
+    context_object_name = None
+
+    def get_queryset(self, user):
+        return self.model.objects.owned_by(user).select_related("owner")
+
+    async def get_context_data(self, obj):
+        return {self.context_object_name: obj, "object": obj}
+
+    async def get(self, request, pk):
+        user = await aget_request_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        key = await sync_to_async(self.get_cache_key)(request, pk)
+        if key is not None:
+            content = await cache.aget(key)
+            if content is not None:
+                return HttpResponse(content)
+        obj = await aget_object_or_404(self.get_queryset(user), pk=pk)
+        response = await arender(
+            request, self.template_name, await self.get_context_data(obj)
+        )
+        if key is not None:
+            await cache.aset(key, response.content, DETAIL_CACHE_TIMEOUT)
+        return response
+
+
+class AsyncMessageListView(AsyncOwnedListView):
+    model = Message
+    template_name = "mailing/messages_all.html"
+    context_object_name = "messages"
+
+
+class AsyncMessageDetailView(AsyncOwnedDetailView):
+    model = Message
+    template_name = "mailing/message_details.html"
+    context_object_name = "message"
+
+
+class AsyncClientListView(AsyncOwnedListView):
+    model = Client
+    template_name = "mailing/clients_all.html"
+    context_object_name = "clients"
+
+
+class AsyncClientDetailView(AsyncOwnedDetailView):
+    model = Client
+    template_name = "mailing/client_details.html"
+    context_object_name = "client"
+
+
+class AsyncSegmentListView(AsyncOwnedListView):
+    model = Segment
+    template_name = "mailing/segments_all.html"
+    context_object_name = "segments"
+
+
+class AsyncMailingListView(AsyncOwnedListView):
+    model = Mailing
+    template_name = "mailing/mailings_all.html"
+    context_object_name = "mailings"
+
+
+class AsyncMailingDetailView(AsyncOwnedDetailView):
+    model = Mailing
+    template_name = "mailing/mailing_details.html"
+    context_object_name = "mailing"
+
+    def get_queryset(self, user):
+        return (
+            Mailing.objects.owned_by(user)
+            .select_related("owner", "message", "segment")
+            .prefetch_related("clients")
+        )
+
+    async def get_context_data(self, obj):
+        context = await super().get_context_data(obj)
+        context["stats"] = await aget_mailing_stats(obj.pk)
+        return context
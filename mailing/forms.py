@@ -1,7 +1,15 @@
-from django.forms import (BooleanField, ModelForm, ModelMultipleChoiceField,
-                          SelectMultiple)
+from datetime import datetime, time, timedelta
 
-from mailing.models import Client, Mailing, Message
+from django.core.exceptions import ValidationError
+from django.forms import (BooleanField, ChoiceField, DateField, DateInput,
+                          FileField, Form, ModelChoiceField, ModelForm,
+                          ModelMultipleChoiceField, Select, SelectMultiple)
+from django.urls import reverse_lazy
+from django.utils import timezone
+
+from mailing.models import AttemptToSend, Client, Mailing, Message, Segment
+from mailing.services import set_mailing_clients
+from users.services import is_manager
 
 
 class StyleFormMixin:
@@ -26,21 +34,172 @@ class ClientForm(StyleFormMixin, ModelForm):
         exclude = ["created_at", "updated_at", "owner"]
 
 
+class ClientAutocompleteWidget(SelectMultiple):
+    """Выбор клиентов с поиском.
+
+    В HTML попадают только выбранные клиенты, остальные подгружаются
+    постранично из mailing:client_search по мере ввода.
+    """
+
+    template_name = "mailing/widgets/client_autocomplete.html"
+
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        self.attrs["data-url"] = reverse_lazy("mailing:client_search")
+
+    def value_from_datadict(self, data, files, name):
+        """Выбранные id приходят одним полем через запятую (см. шаблон виджета),
+        чтобы большой выбор не упирался в DATA_UPLOAD_MAX_NUMBER_FIELDS"""
+        values = data.getlist(name) if hasattr(data, "getlist") else data.get(name)
+        if isinstance(values, str):
+            values = [values]
+        return [pk for value in values or [] for pk in str(value).split(",") if pk]
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [pk for pk in value if str(pk).isdigit()]
+        clients = self.choices.queryset.filter(pk__in=selected).only(
+            "pk", "initials", "email"
+        )
+        options = [
+            self.create_option(
+                name, client.pk, f"{client.initials} <{client.email}>", True, index
+            )
+            for index, client in enumerate(clients)
+        ]
+        return [(None, options, 0)]
+
+
+class MailingAutocompleteWidget(Select):
+    """Выбор одной рассылки с поиском.
+
+    В HTML попадает только выбранная рассылка, остальные подгружаются
+    постранично из mailing:mailing_search по мере ввода.
+    """
+
+    template_name = "mailing/widgets/mailing_autocomplete.html"
+
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        self.attrs["data-url"] = reverse_lazy("mailing:mailing_search")
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [pk for pk in value if str(pk).isdigit()][:1]
+        options = [self.create_option(name, "", "Все", not selected, 0)]
+        mailings = self.choices.queryset.filter(pk__in=selected).only("title")
+        options += [
+            self.create_option(name, mailing.pk, mailing.title, True, 1)
+            for mailing in mailings
+        ]
+        return [(None, options, 0)]
+
+
 class MailingForm(StyleFormMixin, ModelForm):
 
     def __init__(self, *args, **kwargs):
         the_user = kwargs.pop("user", None)
         super(MailingForm, self).__init__(*args, **kwargs)
-        qs_clients = Client.objects.filter(owner=the_user)
+        qs_clients = Client.objects.filter(owner=the_user).only("pk")
         if the_user is not None:
             self.fields["message"].queryset = the_user.message_set.all()
+            self.fields["segment"].queryset = the_user.segment_set.all()
             self.fields["clients"] = ModelMultipleChoiceField(
-                queryset=qs_clients, widget=SelectMultiple, label="Клиенты"
+                queryset=qs_clients,
+                widget=ClientAutocompleteWidget,
+                label="Клиенты",
+                required=False,
             )
         for field_name, field in self.fields.items():
             if field_name == "clients":
                 field.widget.attrs["class"] = "form-select"
 
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get("clients") and not cleaned_data.get("segment"):
+            raise ValidationError("Выберите клиентов или сегмент")
+        return cleaned_data
+
+    def _save_m2m(self):
+        clients = self.cleaned_data.pop("clients", None)
+        super()._save_m2m()
+        if clients is not None:
+            set_mailing_clients(self.instance, clients.values_list("pk", flat=True))
+            self.cleaned_data["clients"] = clients
+
     class Meta:
         model = Mailing
         exclude = ["started_at", "owner", "status_mail"]
+
+
+class SegmentForm(StyleFormMixin, ModelForm):
+    class Meta:
+        model = Segment
+        exclude = ["created_at", "owner"]
+        widgets = {
+            "created_from": DateInput(attrs={"type": "date"}, format="%Y-%m-%d"),
+            "created_to": DateInput(attrs={"type": "date"}, format="%Y-%m-%d"),
+        }
+
+
+class ClientImportForm(StyleFormMixin, Form):
+    file = FileField(
+        label="CSV-файл",
+        help_text="Колонки: email (обязательно), initials, comment. Кодировка UTF-8",
+    )
+
+
+class LogsFilterForm(StyleFormMixin, Form):
+    mailing = ModelChoiceField(
+        queryset=Mailing.objects.none(),
+        required=False,
+        label="Рассылка",
+        widget=MailingAutocompleteWidget,
+    )
+    status = ChoiceField(
+        choices=[("", "Все")] + AttemptToSend.STATUS_CHOICES,
+        required=False,
+        label="Статус",
+    )
+    date_from = DateField(
+        required=False, label="С", widget=DateInput(attrs={"type": "date"})
+    )
+    date_to = DateField(
+        required=False, label="По", widget=DateInput(attrs={"type": "date"})
+    )
+
+    def __init__(self, *args, **kwargs):
+        the_user = kwargs.pop("user", None)
+        super().__init__(*args, **kwargs)
+        mailings = Mailing.objects.only("title").order_by("-pk")
+        if the_user is not None and not is_manager(the_user):
+            mailings = mailings.filter(owner=the_user)
+        self.fields["mailing"].queryset = mailings
+
+    def filter_queryset(self, queryset):
+        """Применяет заполненные фильтры к журналу попыток.
+
+        Даты превращаются в диапазон по time_log_send, чтобы работал индекс.
+        Некорректные фильтры (например, чужая рассылка) дают пустую выборку,
+        а не весь журнал.
+        """
+        if not self.is_bound:
+            return queryset
+        if not self.is_valid():
+            return queryset.none()
+        data = self.cleaned_data
+        if data["mailing"]:
+            queryset = queryset.filter(mailing_list=data["mailing"])
+        if data["status"]:
+            queryset = queryset.filter(status_log=data["status"])
+        if data["date_from"]:
+            queryset = queryset.filter(
+                time_log_send__gte=timezone.make_aware(
+                    datetime.combine(data["date_from"], time.min)
+                )
+            )
+        if data["date_to"]:
+            queryset = queryset.filter(
+                time_log_send__lt=timezone.make_aware(
+                    datetime.combine(data["date_to"] + timedelta(days=1), time.min)
+                )
+            )
+        return queryset
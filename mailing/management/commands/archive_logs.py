@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from config.settings import (ATTEMPT_LOG_ARCHIVE_BATCH_SIZE,
+                             ATTEMPT_LOG_ARCHIVE_DIR,
+                             ATTEMPT_LOG_RETENTION_DAYS)
+from mailing.models import AttemptToSend
+from mailing.services import archive_attempts
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит попытки рассылок старше срока хранения в сжатые файлы по дням "
+        "и удаляет их из БД небольшими пачками"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=ATTEMPT_LOG_RETENTION_DAYS,
+            help="Сколько дней хранить попытки в БД",
+        )
+        parser.add_argument(
+            "--dir",
+            default=ATTEMPT_LOG_ARCHIVE_DIR,
+            help="Каталог для архивных файлов",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ATTEMPT_LOG_ARCHIVE_BATCH_SIZE,
+            help="Сколько строк переносить за одну транзакцию",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Пауза в секундах между пачками, чтобы не нагружать БД",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать строки, которые будут перенесены",
+        )
+
+    def handle(self, *args, **kwargs):
+        cutoff = timezone.now() - timedelta(days=kwargs["days"])
+        if kwargs["dry_run"]:
+            count = AttemptToSend.objects.filter(time_log_send__lt=cutoff).count()
+            self.stdout.write(f"Будет перенесено попыток старше {cutoff}: {count}")
+            return
+
+        total = 0
+        while archived := archive_attempts(
+            cutoff, kwargs["dir"], batch_size=kwargs["batch_size"]
+        ):
+            total += archived
+            self.stdout.write(f"Перенесено в архив: {total}")
+            time.sleep(kwargs["sleep"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово: перенесено {total} попыток старше {cutoff} в {kwargs['dir']}"
+            )
+        )
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+from datetime import timedelta
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from mailing.async_delivery import AsyncMailConnection, asend_mailing
+from mailing.models import AttemptToSend, Client, Mailing, Message
+from mailing.services import (chunked, get_recipients, iter_recipients,
+                              send_mailing)
+from mailing.smtp_sink import SMTPSink
+from users.models import User
+
+
+class DBWriteCounter:
+    """Считает INSERT/UPDATE/DELETE во всех соединениях с БД, в том числе в потоках"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"INSERT": 0, "UPDATE": 0, "DELETE": 0}
+
+    def __call__(self, execute, sql, params, many, context):
+        statement = sql.lstrip()[:6].upper()
+        if statement in self.counts:
+            with self._lock:
+                self.counts[statement] += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs):
+        connection.execute_wrappers.append(self)
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер скорости отправки: локальный SMTP-сервер, синтетические клиенты "
+        "и рассылка через обычный путь доставки"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument(
+            "--mode",
+            choices=["sequential", "threads", "async"],
+            default="sequential",
+            help="Способ отправки",
+        )
+        parser.add_argument("--workers", type=int, default=8, help="Для --mode threads")
+        parser.add_argument(
+            "--concurrency", type=int, default=100, help="Для --mode async"
+        )
+        parser.add_argument(
+            "--latency", type=float, default=0, help="Задержка ответа SMTP, мс"
+        )
+        parser.add_argument(
+            "--failure-rate",
+            type=float,
+            default=0,
+            help="Доля писем, отклоняемых сервером (0..1)",
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Не удалять тестовые данные"
+        )
+
+    def handle(self, *args, **options):
+        mailing = self.seed(options["clients"])
+        counter = DBWriteCounter()
+        sink = SMTPSink(
+            latency=options["latency"] / 1000, failure_rate=options["failure_rate"]
+        )
+        try:
+            with sink, override_settings(
+                EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+                EMAIL_HOST=sink.host,
+                EMAIL_PORT=sink.port,
+                EMAIL_HOST_USER="",
+                EMAIL_HOST_PASSWORD="",
+                EMAIL_USE_TLS=False,
+                EMAIL_USE_SSL=False,
+            ):
+                counter.install(connection=connection)
+                connection_created.connect(counter.install)
+                try:
+                    report = self.run(mailing, sink, options)
+                finally:
+                    connection_created.disconnect(counter.install)
+                    connection.execute_wrappers.remove(counter)
+        finally:
+            if not options["keep"]:
+                self.cleanup(mailing)
+
+        self.stdout.write(f"Режим: {options['mode']}, писем: {len(report)}")
+        self.stdout.write(
+            f"Успешно: {report.counts[AttemptToSend.SUCCESS]}, "
+            f"не успешно: {report.counts[AttemptToSend.FAILED]}"
+        )
+        self.stdout.write(
+            f"Время: {report.elapsed:.2f} с, скорость: {report.throughput:.1f} писем/с"
+        )
+        self.stdout.write(
+            "Задержка письма: "
+            + ", ".join(
+                f"p{percent} {report.percentile(percent) * 1000:.1f} мс"
+                for percent in (50, 95, 99)
+            )
+        )
+        self.stdout.write(
+            "Записей в БД: "
+            + ", ".join(f"{name} {count}" for name, count in counter.counts.items())
+        )
+        self.stdout.write(f"SMTP-соединений: {sink.connections}")
+
+    @staticmethod
+    def run(mailing, sink, options):
+        if options["mode"] == "async":
+            return asyncio.run(
+                asend_mailing(
+                    mailing,
+                    get_recipients(mailing).aiterator(),
+                    concurrency=options["concurrency"],
+                    connection_factory=partial(
+                        AsyncMailConnection,
+                        sink.host,
+                        sink.port,
+                        username="",
+                        password="",
+                        use_tls=False,
+                        start_tls=False,
+                    ),
+                )
+            )
+        workers = options["workers"] if options["mode"] == "threads" else 1
+        return send_mailing(mailing, iter_recipients(mailing), workers=workers)
+
+    @staticmethod
+    def seed(count):
+        owner, _ = User.objects.get_or_create(
+            email="bench@localhost", defaults={"username": "bench", "is_active": False}
+        )
+        message = Message.objects.create(
+            theme="Замер отправки", body="Тестовое письмо", owner=owner
+        )
+        mailing = Mailing.objects.create(
+            title="Замер отправки",
+            message=message,
+            owner=owner,
+            finished_at=timezone.now() + timedelta(days=1),
+        )
+        clients = (
+            Client(email=f"bench{i}@localhost", initials=f"Bench {i}", owner=owner)
+            for i in range(count)
+        )
+        for chunk in chunked(clients, 1000):
+            created = Client.objects.bulk_create(chunk)
+            Mailing.clients.through.objects.bulk_create(
+                Mailing.clients.through(mailing=mailing, client=client)
+                for client in created
+            )
+        return mailing
+
+    @staticmethod
+    def cleanup(mailing):
+        message, owner = mailing.message, mailing.owner
+        mailing.delete()
+        message.delete()
+        Client.objects.filter(owner=owner).delete()
+        owner.delete()
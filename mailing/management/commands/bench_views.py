@@ -0,0 +1,123 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+
+from users.models import User
+
+DEFAULT_PATHS = ["", "clients_all/", "mailings_all/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пропускную способность страниц для чтения: WSGI (пул потоков), "
+        "синхронные views под ASGI и асинхронные views (/async/...) под ASGI. "
+        "Запросы проходят полный стек middleware в процессе, без сетевого сервера"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Email пользователя, от имени которого идут запросы",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Запросов на каждую страницу"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=20, help="Одновременных запросов"
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Страница без начального слеша, можно указать несколько раз "
+            "(по умолчанию главная, клиенты и рассылки)",
+        )
+        parser.add_argument(
+            "--host", default="localhost", help="Заголовок Host (из ALLOWED_HOSTS)"
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            self.user = User.objects.get(email=kwargs["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь {kwargs['user']} не найден")
+        self.headers = {"host": kwargs["host"]}
+        total, concurrency = kwargs["requests"], kwargs["concurrency"]
+
+        for path in kwargs["paths"] or DEFAULT_PATHS:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"/{path}"))
+            self.report("WSGI", self.run_wsgi(f"/{path}", total, concurrency))
+            self.report(
+                "ASGI, sync view",
+                async_to_sync(self.run_asgi)(f"/{path}", total, concurrency),
+            )
+            self.report(
+                "ASGI, async view",
+                async_to_sync(self.run_asgi)(f"/async/{path}", total, concurrency),
+            )
+
+    def report(self, name, result):
+        elapsed, latencies = result
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.stdout.write(
+            f"{name:<18} {len(latencies) / elapsed:8.1f} запросов/с   "
+            f"p50 {statistics.median(latencies) * 1000:7.1f} мс   "
+            f"p99 {p99 * 1000:7.1f} мс"
+        )
+
+    def check_response(self, response, path):
+        if response.status_code != 200:
+            raise CommandError(f"{path}: ответ {response.status_code}")
+
+    def run_wsgi(self, path, total, concurrency):
+        """Пул потоков, как у многопоточного WSGI-сервера; у потока свой клиент"""
+        local = threading.local()
+
+        def request(_):
+            if not hasattr(local, "client"):
+                local.client = Client(headers=self.headers)
+                local.client.force_login(self.user)
+            started = time.perf_counter()
+            response = local.client.get(path)
+            latency = time.perf_counter() - started
+            self.check_response(response, path)
+            return latency
+
+        def close(_):
+            connections.close_all()
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(request, range(concurrency)))
+            started = time.perf_counter()
+            latencies = list(pool.map(request, range(total)))
+            elapsed = time.perf_counter() - started
+            list(pool.map(close, range(concurrency)))
+        return elapsed, latencies
+
+    async def run_asgi(self, path, total, concurrency):
+        """Одновременные запросы в одном цикле событий через ASGI-обработчик"""
+        client = AsyncClient(headers=self.headers)
+        await client.aforce_login(self.user)
+        self.check_response(await client.get(path), path)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latency = time.perf_counter() - started
+            self.check_response(response, path)
+            return latency
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(request() for _ in range(total)))
+        return time.perf_counter() - started, list(latencies)
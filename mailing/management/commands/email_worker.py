@@ -0,0 +1,12 @@
+from mailing.management.queue_worker import QueueWorkerCommand
+from mailing.services import EMAIL_QUEUE
+
+
+class Command(QueueWorkerCommand):
+    help = (
+        "Отправляет служебные письма из очереди QueuedEmail (подтверждение почты, "
+        "сброс пароля); можно запускать на нескольких машинах"
+    )
+    queue = EMAIL_QUEUE
+    title = "Обработчик служебных писем"
+    idle_sleep = 1
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from mailing.models import AttemptToSend
+
+OLD_ORDERING = ["status_log"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает планы запросов к журналу попыток. С --compare дополнительно "
+        "выводит планы со старой сортировкой и без просмотра индексов "
+        "(SET LOCAL внутри транзакции; индексы и таблица не затрагиваются)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Сравнить с планами до добавления индексов",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Выполнить запросы (EXPLAIN ANALYZE) и показать реальное время",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=50, help="Размер страницы журнала"
+        )
+
+    @staticmethod
+    def get_queries(ordering):
+        """Типичные запросы к журналу: история рассылки, журнал владельца,
+        поиск неудачных попыток и общий журнал менеджера"""
+        last = (
+            AttemptToSend.objects.select_related("mailing_list").order_by("-pk").first()
+        )
+        if last is None:
+            raise CommandError("Журнал попыток пуст, сравнивать нечего")
+        mailing = last.mailing_list
+        attempts = AttemptToSend.objects.order_by(*ordering)
+        return {
+            "История рассылки": attempts.filter(mailing_list=mailing),
+            "Журнал владельца": attempts.filter(
+                mailing_list__owner_id=mailing.owner_id
+            ),
+            "Неудачные попытки рассылки": attempts.filter(
+                mailing_list=mailing, status_log=AttemptToSend.FAILED
+            ),
+            "Журнал целиком": attempts,
+        }
+
+    def print_plans(self, title, ordering, limit, analyze):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in self.get_queries(ordering).items():
+            self.stdout.write(self.style.SUCCESS(name))
+            plan = queryset[:limit].explain(analyze=analyze)
+            self.stdout.write(plan)
+            self.stdout.write("")
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor != "postgresql":
+            raise CommandError("Команда рассчитана на PostgreSQL")
+        ordering = AttemptToSend._meta.ordering
+        limit, analyze = kwargs["limit"], kwargs["analyze"]
+
+        if kwargs["compare"]:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_indexscan = off")
+                    cursor.execute("SET LOCAL enable_bitmapscan = off")
+                    cursor.execute("SET LOCAL enable_indexonlyscan = off")
+                self.print_plans("До: без индексов", OLD_ORDERING, limit, analyze)
+
+        self.print_plans("После: с индексами", ordering, limit, analyze)
@@ -0,0 +1,67 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.settings import CLIENT_IMPORT_BATCH_SIZE
+from mailing.services import import_clients
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Импортирует клиентов владельца из CSV (колонки email, initials, comment)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к CSV-файлу")
+        parser.add_argument(
+            "--owner", required=True, help="Email владельца импортируемых клиентов"
+        )
+        parser.add_argument(
+            "--rejected",
+            help="Куда записать отклоненные строки (по умолчанию <path>.rejected.csv)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=CLIENT_IMPORT_BATCH_SIZE,
+            help="Сколько строк проверять и вставлять за раз",
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            owner = User.objects.get(email=kwargs["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь {kwargs['owner']} не найден")
+        rejected_path = kwargs["rejected"] or f"{kwargs['path']}.rejected.csv"
+        started = time.perf_counter()
+
+        def progress(report):
+            processed = sum(report.values())
+            rate = processed / (time.perf_counter() - started)
+            self.stdout.write(
+                f"Обработано {processed}: создано {report['created']}, "
+                f"дубликатов {report['duplicate']}, ошибок {report['invalid']} "
+                f"({rate:.0f} строк/с)"
+            )
+
+        with open(kwargs["path"], encoding="utf-8-sig", newline="") as source:
+            with open(rejected_path, "w", encoding="utf-8", newline="") as rejected:
+                try:
+                    report = import_clients(
+                        owner,
+                        source,
+                        rejected=csv.writer(rejected),
+                        batch_size=kwargs["batch_size"],
+                        progress=progress,
+                    )
+                except (ValueError, csv.Error) as e:
+                    raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано клиентов: {report['created']} "
+                f"за {time.perf_counter() - started:.1f} с"
+            )
+        )
+        if report["duplicate"] or report["invalid"]:
+            self.stdout.write(f"Отклоненные строки: {rejected_path}")
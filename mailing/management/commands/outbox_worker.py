@@ -0,0 +1,12 @@
+from mailing.management.queue_worker import QueueWorkerCommand
+from mailing.services import OUTBOX, AttemptLogWriter, deliver_outbox
+
+
+class Command(QueueWorkerCommand):
+    help = "Отправляет письма из очереди OutboxMessage (можно запускать на нескольких машинах)"
+    queue = OUTBOX
+    title = "Обработчик очереди"
+
+    def deliver(self, worker, batch, connection, lease):
+        with AttemptLogWriter() as log_writer:
+            return deliver_outbox(worker, batch, connection, log_writer, lease)
@@ -1,25 +1,101 @@
+import asyncio
+import signal
+
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 
-from mailing.models import Mailing
-from mailing.services import send_email, update_status
+from config.settings import EMAIL_ASYNC_CONCURRENCY, RECIPIENT_CHUNK_SIZE
+from mailing.async_delivery import asend_mailing
+from mailing.models import AttemptToSend
+from mailing.services import (claim_run, enqueue_mailing, get_due_mailings,
+                              get_recipients, iter_recipients, send_mailing,
+                              update_status)
 
 
 class Command(BaseCommand):
-    help = "Отправляет письма для активных рассылок"
+    help = "Отправляет письма рассылок, время запуска которых наступило"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Количество потоков отправки, у каждого своё SMTP-соединение",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="use_async",
+            help="Отправлять через асинхронный движок (asyncio)",
+        )
+        parser.add_argument(
+            "--outbox",
+            action="store_true",
+            help="Только поставить письма в очередь для outbox_worker",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=EMAIL_ASYNC_CONCURRENCY,
+            help="Число одновременных SMTP-диалогов для --async",
+        )
+
+    @staticmethod
+    def terminate(signum, frame):
+        raise SystemExit(128 + signum)
+
+    def write_result(self, email, status):
+        """Строка по получателю выводится сразу, а не копится до конца рассылки"""
+        if status == AttemptToSend.SUCCESS:
+            self.stdout.write(f"Письмо отправлено на {email}")
+        else:
+            self.stdout.write(f"Не удалось отправить письмо на {email}")
 
     def handle(self, *args, **kwargs):
-        mailings = Mailing.objects.filter(status_mail="STARTED" or "CREATED")
+        # SIGTERM завершает команду исключением, чтобы буфер журнала попыток
+        # успел сохраниться при выходе из with
+        signal.signal(signal.SIGTERM, self.terminate)
+        now = timezone.now()
 
-        for mailing in mailings:
+        for mailing in get_due_mailings(now):
+            if not claim_run(mailing, now):
+                continue
             self.stdout.write(f"Обработка рассылки: {mailing.title}")
             update_status(mailing)
 
             if mailing.status_mail != "COMPLETED":
-                clients = mailing.clients.all()
+                if kwargs["outbox"]:
+                    enqueue_mailing(mailing, get_recipients(mailing))
+                    self.stdout.write(f"Письма рассылки {mailing.title} в очереди")
+                    continue
+                if kwargs["use_async"]:
+                    report = asyncio.run(
+                        asend_mailing(
+                            mailing,
+                            get_recipients(mailing).aiterator(
+                                chunk_size=RECIPIENT_CHUNK_SIZE
+                            ),
+                            concurrency=kwargs["concurrency"],
+                            on_result=self.write_result,
+                        )
+                    )
+                else:
+                    report = send_mailing(
+                        mailing,
+                        iter_recipients(mailing),
+                        workers=kwargs["workers"],
+                        on_result=self.write_result,
+                    )
 
-                for client in clients:
-                    send_email(mailing, client)
-                    self.stdout.write(f"Письмо отправлено на {client.email} {client}")
+                self.stdout.write(
+                    f"Успешно: {report.counts[AttemptToSend.SUCCESS]}, "
+                    f"не успешно: {report.counts[AttemptToSend.FAILED]}"
+                )
+                self.stdout.write(
+                    f"Скорость: {report.throughput:.1f} писем/с, задержка "
+                    f"p50 {report.percentile(50) * 1000:.1f} мс, "
+                    f"p95 {report.percentile(95) * 1000:.1f} мс"
+                )
             else:
                 self.stdout.write(
                     f"Рассылка {mailing.title} завершена и не может быть отправлена."
@@ -0,0 +1,79 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from mailing.services import MailConnection
+
+
+class QueueWorkerCommand(BaseCommand):
+    """Общий цикл обработчиков очередей LeasedQueue (outbox_worker, email_worker).
+
+    Подкласс задает queue (экземпляр LeasedQueue), title для сообщений и при
+    необходимости переопределяет deliver.
+    """
+
+    queue = None
+    title = "Обработчик очереди"
+    idle_sleep = 5
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=self.queue.batch_size,
+            help="Сколько писем забирать из очереди за раз",
+        )
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=self.queue.lease,
+            help="Через сколько секунд письма упавшего обработчика забираются повторно",
+        )
+        parser.add_argument(
+            "--idle-sleep",
+            type=float,
+            default=self.idle_sleep,
+            help="Пауза в секундах, когда очередь пуста",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Разобрать очередь и завершиться, не дожидаясь новых писем",
+        )
+
+    @staticmethod
+    def terminate(signum, frame):
+        raise SystemExit(128 + signum)
+
+    def deliver(self, worker, batch, connection, lease):
+        return self.queue.deliver(worker, batch, connection, lease=lease)
+
+    def handle(self, *args, **kwargs):
+        signal.signal(signal.SIGTERM, self.terminate)
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"{self.title} {worker} запущен")
+        model = self.queue.model
+
+        with MailConnection() as connection:
+            while True:
+                batch = self.queue.claim(
+                    worker, limit=kwargs["batch_size"], lease=kwargs["lease"]
+                )
+                if not batch:
+                    if kwargs["once"]:
+                        break
+                    time.sleep(kwargs["idle_sleep"])
+                    continue
+
+                done = self.deliver(worker, batch, connection, kwargs["lease"])
+                self.stdout.write(
+                    f"Отправлено: {len(done[model.SENT])}, "
+                    f"не отправлено: {len(done[model.FAILED])}, "
+                    f"отложено для повтора: {len(done[model.PENDING])}, "
+                    f"пропущено (аренда истекла): {len(done[model.SENDING])}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Очередь разобрана!"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_started_mailings(apps, schema_editor):
+    """Запущенные рассылки раньше подхватывала команда send_mail, теперь их ведет планировщик"""
+    Mailing = apps.get_model("mailing", "Mailing")
+    Mailing.objects.filter(status_mail="STARTED").update(next_run_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailing", "0004_outboxmessage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailing",
+            name="next_run_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                null=True,
+                verbose_name="Время следующего запуска",
+            ),
+        ),
+        migrations.RunPython(schedule_started_mailings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:59
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("mailing", "0005_mailing_next_run_at"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="attempttosend",
+            options={
+                "ordering": ["-time_log_send", "-pk"],
+                "verbose_name": "Попытка рассылки",
+                "verbose_name_plural": "Попытки рассылок",
+            },
+        ),
+        AddIndexConcurrently(
+            model_name="attempttosend",
+            index=models.Index(
+                fields=["mailing_list", "-time_log_send", "-id"],
+                name="attempt_mailing_time_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="attempttosend",
+            index=models.Index(
+                fields=["-time_log_send", "-id"], name="attempt_time_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="attempttosend",
+            index=models.Index(
+                condition=models.Q(("status_log", "Failed")),
+                fields=["mailing_list", "-time_log_send"],
+                name="attempt_failed_idx",
+            ),
+        ),
+    ]
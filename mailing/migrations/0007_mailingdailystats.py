@@ -0,0 +1,88 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Заполняет статистику по уже накопленному журналу попыток"""
+    AttemptToSend = apps.get_model("mailing", "AttemptToSend")
+    MailingDailyStats = apps.get_model("mailing", "MailingDailyStats")
+    rows = (
+        AttemptToSend.objects.annotate(day=TruncDate("time_log_send"))
+        .values("mailing_list_id", "day")
+        .annotate(
+            sent=Count("pk", filter=Q(status_log="Success")),
+            failed=Count("pk", filter=Q(status_log="Failed")),
+        )
+        .order_by()
+    )
+    MailingDailyStats.objects.bulk_create(
+        (
+            MailingDailyStats(
+                mailing_id=row["mailing_list_id"],
+                day=row["day"],
+                sent=row["sent"],
+                failed=row["failed"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailing", "0006_attempttosend_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MailingDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="День")),
+                (
+                    "sent",
+                    models.PositiveIntegerField(default=0, verbose_name="Отправлено"),
+                ),
+                (
+                    "failed",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Не отправлено"
+                    ),
+                ),
+                (
+                    "mailing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="mailing.mailing",
+                        verbose_name="Рассылка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика рассылки за день",
+                "verbose_name_plural": "Статистика рассылок по дням",
+                "ordering": ["-day"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("mailing", "day"), name="mailing_daily_stats_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:04
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("mailing", "0007_mailingdailystats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="client",
+            index=models.Index(
+                fields=["owner", "email"], name="client_owner_email_idx"
+            ),
+        ),
+    ]
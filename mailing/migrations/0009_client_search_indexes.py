@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:11
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("mailing", "0008_client_owner_email_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="client",
+            index=models.Index(
+                models.F("owner"),
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("email"),
+                    name="text_pattern_ops",
+                ),
+                name="client_email_search_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="client",
+            index=models.Index(
+                models.F("owner"),
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("initials"),
+                    name="text_pattern_ops",
+                ),
+                name="client_initials_search_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailing", "0009_client_search_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="mailing",
+            name="clients",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="mailing_clients",
+                to="mailing.client",
+                verbose_name="Клиенты_рассылки",
+            ),
+        ),
+        migrations.CreateModel(
+            name="Segment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "title",
+                    models.CharField(max_length=200, verbose_name="Название сегмента"),
+                ),
+                (
+                    "email_domain",
+                    models.CharField(
+                        blank=True,
+                        help_text="Например, example.com",
+                        max_length=100,
+                        verbose_name="Домен email",
+                    ),
+                ),
+                (
+                    "created_from",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Клиент добавлен не раньше"
+                    ),
+                ),
+                (
+                    "created_to",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Клиент добавлен не позже"
+                    ),
+                ),
+                (
+                    "comment_contains",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="Комментарий содержит"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Владелец",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Сегмент",
+                "verbose_name_plural": "Сегменты",
+                "ordering": ["-pk"],
+            },
+        ),
+        migrations.AddField(
+            model_name="mailing",
+            name="segment",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Клиенты сегмента получают рассылку вместе с выбранными вручную",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="mailings",
+                to="mailing.segment",
+                verbose_name="Сегмент",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:16
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("mailing", "0010_segment"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="client",
+            index=models.Index(fields=["owner", "-id"], name="client_owner_id_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="mailing",
+            index=models.Index(fields=["owner", "-id"], name="mailing_owner_id_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(fields=["owner", "-id"], name="message_owner_id_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="segment",
+            index=models.Index(fields=["owner", "-id"], name="segment_owner_id_idx"),
+        ),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailing", "0011_owner_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueuedEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=255, verbose_name="Тема")),
+                ("body", models.TextField(verbose_name="Текст")),
+                (
+                    "html_body",
+                    models.TextField(
+                        blank=True, default="", verbose_name="HTML-версия"
+                    ),
+                ),
+                (
+                    "from_email",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="Пустое значение - DEFAULT_FROM_EMAIL",
+                        max_length=254,
+                        verbose_name="Отправитель",
+                    ),
+                ),
+                ("to", models.EmailField(max_length=254, verbose_name="Получатель")),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("Pending", "В очереди"),
+                            ("Sending", "Отправляется"),
+                            ("Sent", "Отправлено"),
+                            ("Failed", "Не отправлено"),
+                        ],
+                        default="Pending",
+                        max_length=10,
+                        verbose_name="Состояние",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество попыток"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Время следующей попытки",
+                    ),
+                ),
+                (
+                    "locked_by",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=100,
+                        verbose_name="Обработчик",
+                    ),
+                ),
+                (
+                    "locked_until",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Заблокировано до"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True, default="", verbose_name="Последняя ошибка"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Служебное письмо",
+                "verbose_name_plural": "Служебные письма",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("state", "Pending")),
+                        fields=["next_attempt_at"],
+                        name="queued_email_pending_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("state", "Sending")),
+                        fields=["locked_until"],
+                        name="queued_email_sending_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailing", "0012_queuedemail"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="mailing",
+            name="next_run_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                null=True,
+                verbose_name="Время следующего запуска",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailing", "0014_segment_owner_set_null"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="last_error",
+            field=models.TextField(
+                blank=True, default="", verbose_name="Последняя ошибка"
+            ),
+        ),
+    ]
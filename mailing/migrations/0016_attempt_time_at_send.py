@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:51
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailing", "0015_outbox_last_error"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="attempttosend",
+            name="time_log_send",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="дата и время последней попытки",
+            ),
+        ),
+    ]
@@ -1,9 +1,48 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 from users.models import User
+from users.services import is_manager
+
+
+class OwnedQuerySet(models.QuerySet):
+    """Выборки объектов с учетом владельца и роли пользователя.
+
+    Сортировка по убыванию pk вместе с индексом (owner, -id) позволяет
+    отдавать страницу списка просмотром диапазона индекса без сортировки.
+    Поля для списка модель перечисляет в LIST_FIELDS, связанные объекты,
+    которые показывает шаблон, - в LIST_RELATED.
+    """
+
+    def owned_by(self, user):
+        """Только объекты пользователя"""
+        return self.filter(owner=user).order_by("-pk")
+
+    def for_user(self, user):
+        """Менеджер видит объекты всех владельцев, остальные - только свои"""
+        if is_manager(user):
+            return self.order_by("-pk")
+        return self.owned_by(user)
+
+    def for_list(self, user):
+        """Выборка для страницы списка: только показываемые поля одним запросом"""
+        model = self.model
+        return (
+            self.for_user(user)
+            .select_related(*model.LIST_RELATED)
+            .only(*model.LIST_FIELDS)
+        )
 
 
 class Client(models.Model):
+    LIST_FIELDS = ["initials", "email", "comment", "owner__username"]
+    LIST_RELATED = ["owner"]
+
     email = models.EmailField(max_length=50, verbose_name="Почта")
     initials = models.CharField(max_length=100, verbose_name="Ф.И.О.")
     comment = models.TextField(null=True, blank=True, verbose_name="Комментарий")
@@ -18,6 +57,8 @@ class Client(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OwnedQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.initials}"
 
@@ -25,9 +66,26 @@ class Client(models.Model):
         verbose_name = "Клиент"
         verbose_name_plural = "Клиенты"
         ordering = ["email"]
+        indexes = [
+            models.Index(fields=["owner", "-id"], name="client_owner_id_idx"),
+            models.Index(fields=["owner", "email"], name="client_owner_email_idx"),
+            # Поиск клиентов по началу email или Ф.И.О. без учета регистра
+            models.Index(
+                F("owner"),
+                OpClass(Upper("email"), name="text_pattern_ops"),
+                name="client_email_search_idx",
+            ),
+            models.Index(
+                F("owner"),
+                OpClass(Upper("initials"), name="text_pattern_ops"),
+                name="client_initials_search_idx",
+            ),
+        ]
 
 
 class Message(models.Model):
+    LIST_FIELDS = ["theme", "body", "owner__username"]
+    LIST_RELATED = ["owner"]
     theme = models.CharField(max_length=200, verbose_name="Тема письма")
     body = models.TextField(verbose_name="Тело письма")
     owner = models.ForeignKey(
@@ -41,6 +99,8 @@ class Message(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OwnedQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.theme}"
 
@@ -48,6 +108,93 @@ class Message(models.Model):
         verbose_name = "Сообщение"
         verbose_name_plural = "Сообщения"
         ordering = ["theme"]
+        indexes = [
+            models.Index(fields=["owner", "-id"], name="message_owner_id_idx"),
+        ]
+
+
+class Segment(models.Model):
+    """Динамическая аудитория: клиенты владельца, подходящие под правила.
+
+    Состав не хранится, а вычисляется одним SQL-запросом в момент отправки,
+    поэтому новые клиенты попадают в рассылку без правки связей. Пустые
+    правила не ограничивают выборку: сегмент без правил - все клиенты владельца.
+    """
+
+    LIST_FIELDS = [
+        "title",
+        "email_domain",
+        "created_from",
+        "created_to",
+        "comment_contains",
+        "owner__username",
+    ]
+    LIST_RELATED = ["owner"]
+
+    title = models.CharField(max_length=200, verbose_name="Название сегмента")
+    email_domain = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Домен email",
+        help_text="Например, example.com",
+    )
+    created_from = models.DateField(
+        null=True, blank=True, verbose_name="Клиент добавлен не раньше"
+    )
+    created_to = models.DateField(
+        null=True, blank=True, verbose_name="Клиент добавлен не позже"
+    )
+    comment_contains = models.CharField(
+        max_length=100, blank=True, verbose_name="Комментарий содержит"
+    )
+    owner = models.ForeignKey(
+        User,
+        verbose_name="Владелец",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = OwnedQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.title}"
+
+    def get_filter(self):
+        """Правила сегмента в виде условия на Client.
+
+        Сегмент без владельца (владелец удален) не выбирает никого, а не
+        клиентов без владельца.
+        """
+        if self.owner_id is None:
+            return models.Q(pk__in=[])
+        condition = models.Q(owner_id=self.owner_id)
+        if self.email_domain:
+            condition &= models.Q(email__iendswith=f"@{self.email_domain.lstrip('@')}")
+        if self.created_from:
+            condition &= models.Q(
+                created_at__gte=timezone.make_aware(
+                    datetime.combine(self.created_from, time.min)
+                )
+            )
+        if self.created_to:
+            condition &= models.Q(
+                created_at__lt=timezone.make_aware(
+                    datetime.combine(self.created_to + timedelta(days=1), time.min)
+                )
+            )
+        if self.comment_contains:
+            condition &= models.Q(comment__icontains=self.comment_contains)
+        return condition
+
+    class Meta:
+        verbose_name = "Сегмент"
+        verbose_name_plural = "Сегменты"
+        ordering = ["-pk"]
+        indexes = [
+            models.Index(fields=["owner", "-id"], name="segment_owner_id_idx"),
+        ]
 
 
 class Mailing(models.Model):
@@ -73,6 +220,17 @@ class Mailing(models.Model):
         (COMPLETED, "Завершена"),
     ]
 
+    LIST_FIELDS = [
+        "title",
+        "started_at",
+        "finished_at",
+        "period_mail",
+        "status_mail",
+        "message__theme",
+        "owner__username",
+    ]
+    LIST_RELATED = ["message", "owner"]
+
     title = models.CharField(max_length=200, verbose_name="Название рассылки")
     started_at = models.DateTimeField(
         auto_now_add=True, verbose_name="Время начала рассылки"
@@ -93,7 +251,19 @@ class Mailing(models.Model):
         verbose_name="Статус_рассылки",
     )
     clients = models.ManyToManyField(
-        Client, verbose_name="Клиенты_рассылки", related_name="mailing_clients"
+        Client,
+        blank=True,
+        verbose_name="Клиенты_рассылки",
+        related_name="mailing_clients",
+    )
+    segment = models.ForeignKey(
+        Segment,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="mailings",
+        verbose_name="Сегмент",
+        help_text="Клиенты сегмента получают рассылку вместе с выбранными вручную",
     )
     message = models.ForeignKey(
         Message,
@@ -109,6 +279,15 @@ class Mailing(models.Model):
         null=True,
         on_delete=models.SET_NULL,
     )
+    next_run_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="Время следующего запуска",
+    )
+
+    objects = OwnedQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.title}"
@@ -116,6 +295,9 @@ class Mailing(models.Model):
     class Meta:
         verbose_name = "Рассылка"
         verbose_name_plural = "Рассылки"
+        indexes = [
+            models.Index(fields=["owner", "-id"], name="mailing_owner_id_idx"),
+        ]
         permissions = [
             ("can_disable_mailing", "Can disable mailing"),
         ]
@@ -135,7 +317,9 @@ class AttemptToSend(models.Model):
         choices=STATUS_CHOICES, default=SUCCESS, verbose_name="Статус"
     )
     time_log_send = models.DateTimeField(
-        auto_now_add=True, verbose_name="дата и время последней попытки"
+        default=timezone.now,
+        editable=False,
+        verbose_name="дата и время последней попытки",
     )
 
     server_response = models.CharField(
@@ -148,4 +332,171 @@ class AttemptToSend(models.Model):
     class Meta:
         verbose_name = "Попытка рассылки"
         verbose_name_plural = "Попытки рассылок"
-        ordering = ["status_log"]
+        ordering = ["-time_log_send", "-pk"]
+        indexes = [
+            models.Index(
+                fields=["mailing_list", "-time_log_send", "-id"],
+                name="attempt_mailing_time_idx",
+            ),
+            models.Index(fields=["-time_log_send", "-id"], name="attempt_time_idx"),
+            models.Index(
+                fields=["mailing_list", "-time_log_send"],
+                condition=models.Q(status_log="Failed"),
+                name="attempt_failed_idx",
+            ),
+        ]
+
+
+class LeasedQueueItem(models.Model):
+    """Общие поля очереди с арендой строк: состояние, попытки и блокировка.
+
+    Выборкой, отправкой и повторами управляет mailing.services.LeasedQueue.
+    """
+
+    PENDING = "Pending"
+    SENDING = "Sending"
+    SENT = "Sent"
+    FAILED = "Failed"
+
+    STATE_CHOICES = [
+        (PENDING, "В очереди"),
+        (SENDING, "Отправляется"),
+        (SENT, "Отправлено"),
+        (FAILED, "Не отправлено"),
+    ]
+
+    state = models.CharField(
+        max_length=10, choices=STATE_CHOICES, default=PENDING, verbose_name="Состояние"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Количество попыток")
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Время следующей попытки"
+    )
+    locked_by = models.CharField(
+        max_length=100, blank=True, default="", verbose_name="Обработчик"
+    )
+    locked_until = models.DateTimeField(
+        null=True, blank=True, verbose_name="Заблокировано до"
+    )
+    last_error = models.TextField(
+        blank=True, default="", verbose_name="Последняя ошибка"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+
+class OutboxMessage(LeasedQueueItem):
+    """Письмо рассылки одному клиенту в очереди на отправку.
+
+    Строки забирают обработчики (команда outbox_worker) через
+    SELECT ... FOR UPDATE SKIP LOCKED, поэтому их может быть сколько угодно
+    на разных машинах. Строки упавшего обработчика забираются повторно после
+    истечения locked_until.
+    """
+
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        related_name="outbox",
+        verbose_name="Рассылка",
+    )
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, verbose_name="Клиент")
+
+    def __str__(self):
+        return f"{self.mailing_id} {self.client_id} {self.state}"
+
+    class Meta:
+        verbose_name = "Письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["mailing", "client"],
+                condition=models.Q(state__in=["Pending", "Sending"]),
+                name="outbox_unique_active",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(state="Pending"),
+                name="outbox_pending_idx",
+            ),
+            models.Index(
+                fields=["locked_until"],
+                condition=models.Q(state="Sending"),
+                name="outbox_sending_idx",
+            ),
+        ]
+
+
+class QueuedEmail(LeasedQueueItem):
+    """Служебное письмо (подтверждение почты, приветствие, сброс пароля).
+
+    Views ставят письмо в очередь после фиксации транзакции, а отправляет его
+    команда email_worker, поэтому ответ пользователю не ждет почтовый сервер.
+    Строки забираются так же, как OutboxMessage.
+    """
+
+    subject = models.CharField(max_length=255, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст")
+    html_body = models.TextField(blank=True, default="", verbose_name="HTML-версия")
+    from_email = models.CharField(
+        max_length=254,
+        blank=True,
+        default="",
+        verbose_name="Отправитель",
+        help_text="Пустое значение - DEFAULT_FROM_EMAIL",
+    )
+    to = models.EmailField(max_length=254, verbose_name="Получатель")
+
+    def __str__(self):
+        return f"{self.to} {self.subject} {self.state}"
+
+    class Meta:
+        verbose_name = "Служебное письмо"
+        verbose_name_plural = "Служебные письма"
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(state="Pending"),
+                name="queued_email_pending_idx",
+            ),
+            models.Index(
+                fields=["locked_until"],
+                condition=models.Q(state="Sending"),
+                name="queued_email_sending_idx",
+            ),
+        ]
+
+
+class MailingDailyStats(models.Model):
+    """Число успешных и неудачных попыток рассылки за день.
+
+    Пополняется вместе с записью попыток (services.save_attempts), чтобы
+    статистика читалась без подсчета строк AttemptToSend.
+    """
+
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+        verbose_name="Рассылка",
+    )
+    day = models.DateField(verbose_name="День")
+    sent = models.PositiveIntegerField(default=0, verbose_name="Отправлено")
+    failed = models.PositiveIntegerField(default=0, verbose_name="Не отправлено")
+
+    def __str__(self):
+        return f"{self.mailing_id} {self.day}: {self.sent}/{self.failed}"
+
+    class Meta:
+        verbose_name = "Статистика рассылки за день"
+        verbose_name_plural = "Статистика рассылок по дням"
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["mailing", "day"], name="mailing_daily_stats_unique"
+            ),
+        ]
@@ -1,43 +1,1271 @@
-from django.core.mail import send_mail
+import calendar
+import csv
+import gzip
+import heapq
+import json
+import os
+import queue
+import random
+import smtplib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from hashlib import md5
+from itertools import islice
+from pathlib import Path
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.mail import (EmailMessage, EmailMultiAlternatives,
+                              get_connection)
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import EmailValidator
+from django.db import connection as db_connection
+from django.db import transaction
+from django.db.models import Count, F, Q
 from django.utils import timezone
 
-from config.settings import EMAIL_HOST_USER
-from mailing.models import AttemptToSend
+from config.settings import (ATTEMPT_LOG_ARCHIVE_BATCH_SIZE,
+                             ATTEMPT_LOG_BATCH_SIZE,
+                             ATTEMPT_LOG_FLUSH_INTERVAL,
+                             CLIENT_IMPORT_BATCH_SIZE, DASHBOARD_CACHE_TIMEOUT,
+                             EMAIL_HOST_USER,
+                             EMAIL_MAX_MESSAGES_PER_CONNECTION,
+                             EMAIL_QUEUE_BATCH_SIZE, EMAIL_QUEUE_LEASE_SECONDS,
+                             EMAIL_QUEUE_MAX_ATTEMPTS,
+                             EMAIL_QUEUE_RETRY_BASE_DELAY,
+                             EMAIL_QUEUE_RETRY_MAX_DELAY, EXPORT_CHUNK_SIZE,
+                             OUTBOX_BATCH_SIZE, OUTBOX_LEASE_SECONDS,
+                             OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE_DELAY,
+                             OUTBOX_RETRY_MAX_DELAY, RECIPIENT_CHUNK_SIZE)
+from mailing.models import (AttemptToSend, Client, Mailing, MailingDailyStats,
+                            Message, OutboxMessage, QueuedEmail)
 
 
-def send_email(mailing, client):
-    """Функция отправки сообщений пользователям и занесение данных по результатам рассылки"""
+class MailConnection:
+    """Одно соединение с почтовым сервером на весь прогон рассылки.
+
+    Переподключается после max_messages писем и при обрыве связи сервером.
+    """
+
+    def __init__(self, max_messages=EMAIL_MAX_MESSAGES_PER_CONNECTION):
+        self.max_messages = max_messages
+        self.backend = get_connection(fail_silently=False)
+        self.is_open = False
+        self.sent_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        self.backend.open()
+        self.is_open = True
+        self.sent_count = 0
+
+    def close(self):
+        self.is_open = False
+        try:
+            self.backend.close()
+        except smtplib.SMTPException:
+            pass
+
+    def reconnect(self):
+        self.close()
+        self.open()
+
+    def send(self, message):
+        """Отправляет письмо по открытому соединению, возвращает число отправленных писем"""
+        if not self.is_open:
+            self.open()
+        elif self.max_messages and self.sent_count >= self.max_messages:
+            self.reconnect()
+        try:
+            sent = self.backend.send_messages([message])
+        except smtplib.SMTPServerDisconnected:
+            self.reconnect()
+            sent = self.backend.send_messages([message])
+        self.sent_count += 1
+        return sent
+
+
+class AttemptLogWriter:
+    """Буфер журнала попыток отправки.
+
+    Копит записи AttemptToSend и сохраняет их одним bulk_create, когда набралось
+    batch_size записей или прошло flush_interval секунд с прошлого сохранения.
+    При выходе из with (в том числе по исключению) остаток сбрасывается в БД.
+    Потокобезопасен: один буфер можно делить между потоками отправки.
+    """
+
+    def __init__(
+        self,
+        batch_size=ATTEMPT_LOG_BATCH_SIZE,
+        flush_interval=ATTEMPT_LOG_FLUSH_INTERVAL,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aflush()
+
+    def _append(self, attempt):
+        """Добавляет запись в буфер, возвращает True, если пора сбросить буфер"""
+        with self._lock:
+            self._buffer.append(attempt)
+            return (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+    def add(self, attempt):
+        if self._append(attempt):
+            self.flush()
+
+    async def aadd(self, attempt):
+        if self._append(attempt):
+            await self.aflush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if batch:
+            save_attempts(batch)
+
+    async def aflush(self):
+        await sync_to_async(self.flush)()
+
+
+def record_daily_stats(attempts):
+    """Прибавляет сохраненные попытки к дневной статистике рассылок.
+
+    Все затронутые пары (рассылка, день) обновляются одним
+    INSERT ... ON CONFLICT DO UPDATE в порядке ключа, чтобы параллельные
+    обработчики не взаимоблокировались.
+    """
+    rows = {}
+    for attempt in attempts:
+        key = (attempt.mailing_list_id, timezone.localdate(attempt.time_log_send))
+        sent, failed = rows.get(key, (0, 0))
+        if attempt.status_log == AttemptToSend.SUCCESS:
+            sent += 1
+        else:
+            failed += 1
+        rows[key] = (sent, failed)
+    if not rows:
+        return
+
+    table = MailingDailyStats._meta.db_table
+    values = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+    sql = f"""
+        INSERT INTO {table} (mailing_id, day, sent, failed) VALUES {values}
+        ON CONFLICT (mailing_id, day) DO UPDATE SET
+            sent = {table}.sent + EXCLUDED.sent,
+            failed = {table}.failed + EXCLUDED.failed
+    """
+    params = [
+        value
+        for (mailing_id, day), (sent, failed) in sorted(rows.items())
+        for value in (mailing_id, day, sent, failed)
+    ]
+    with db_connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+    mailing_ids = {mailing_id for mailing_id, _ in rows}
+    owner_ids = Mailing.objects.filter(pk__in=mailing_ids).values_list(
+        "owner_id", flat=True
+    )
+    for owner_id in set(owner_ids):
+        invalidate_dashboard(owner_id)
+    bump_object_versions(Mailing, mailing_ids)
+
+
+def save_attempts(attempts):
+    """Сохраняет попытки отправки и дневную статистику в одной транзакции"""
+    with transaction.atomic():
+        AttemptToSend.objects.bulk_create(attempts, batch_size=ATTEMPT_LOG_BATCH_SIZE)
+        record_daily_stats(attempts)
+
+
+def get_mailing_stats(mailing_id):
+    """Статистика рассылки по дням (от новых к старым) и итог за все время"""
+    days = list(
+        MailingDailyStats.objects.filter(mailing_id=mailing_id).values(
+            "day", "sent", "failed"
+        )
+    )
+    return {
+        "sent": sum(row["sent"] for row in days),
+        "failed": sum(row["failed"] for row in days),
+        "days": days,
+    }
+
+
+async def aget_mailing_stats(mailing_id):
+    """Асинхронный вариант get_mailing_stats"""
+    days = [
+        row
+        async for row in MailingDailyStats.objects.filter(mailing_id=mailing_id).values(
+            "day", "sent", "failed"
+        )
+    ]
+    return {
+        "sent": sum(row["sent"] for row in days),
+        "failed": sum(row["failed"] for row in days),
+        "days": days,
+    }
+
+
+def archive_attempts(cutoff, archive_dir, batch_size=ATTEMPT_LOG_ARCHIVE_BATCH_SIZE):
+    """Переносит в архив одну пачку попыток старше cutoff, возвращает ее размер.
+
+    Пачка дописывается в gzip-файлы JSON Lines по дням
+    (attempts-ГГГГ-ММ-ДД.jsonl.gz) и только после записи на диск удаляется из
+    БД одним коротким DELETE по pk. Итоги по рассылкам остаются в
+    MailingDailyStats, которая пополняется еще при записи попыток.
+    """
+    rows = list(
+        AttemptToSend.objects.filter(time_log_send__lt=cutoff)
+        .order_by("time_log_send", "pk")
+        .values(
+            "id",
+            "mailing_list_id",
+            "client_id",
+            "status_log",
+            "time_log_send",
+            "server_response",
+        )[:batch_size]
+    )
+    if not rows:
+        return 0
+
+    by_day = defaultdict(list)
+    for row in rows:
+        by_day[timezone.localdate(row["time_log_send"])].append(row)
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    for day, day_rows in by_day.items():
+        lines = "".join(
+            json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+            for row in day_rows
+        )
+        with open(archive_dir / f"attempts-{day:%Y-%m-%d}.jsonl.gz", "ab") as file:
+            with gzip.GzipFile(fileobj=file, mode="ab") as archive:
+                archive.write(lines.encode("utf-8"))
+            file.flush()
+            os.fsync(file.fileno())
+
+    AttemptToSend.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+    return len(rows)
+
+
+CLIENT_IMPORT_FIELDS = ("email", "initials", "comment")
+
+
+def import_clients(
+    owner, rows, rejected=None, batch_size=CLIENT_IMPORT_BATCH_SIZE, progress=None
+):
+    """Потоковый импорт клиентов владельца из CSV.
+
+    rows - итерируемое строк CSV с заголовком (email обязателен, initials и
+    comment - нет), читается лениво. Адреса проверяются и сверяются с уже
+    имеющимися у владельца пачками по batch_size, новые клиенты создаются
+    одним bulk_create на пачку. Каждая пачка сохраняется сразу, поэтому при
+    ошибке в середине файла уже загруженные пачки остаются. Отклоненные строки
+    с причиной пишутся в rejected (csv.writer), progress вызывается после
+    каждой пачки со счетчиками. Возвращает Counter: created, duplicate, invalid.
+    """
+    report = Counter(created=0, duplicate=0, invalid=0)
+    reader = csv.DictReader(rows)
+    if reader.fieldnames is None or "email" not in reader.fieldnames:
+        raise ValueError("В файле нет колонки email")
+    if rejected is not None:
+        rejected.writerow([*CLIENT_IMPORT_FIELDS, "error"])
+
+    validate = EmailValidator()
+    max_length = Client._meta.get_field("email").max_length
+    known = set(
+        email.lower()
+        for email in Client.objects.filter(owner=owner)
+        .values_list("email", flat=True)
+        .iterator(chunk_size=RECIPIENT_CHUNK_SIZE)
+    )
+
+    def reject(row, reason, error):
+        report[reason] += 1
+        if rejected is not None:
+            rejected.writerow(
+                [row.get(field) or "" for field in CLIENT_IMPORT_FIELDS] + [error]
+            )
+
     try:
-        mail_response = send_mail(
-            subject=mailing.message.theme,
-            message=mailing.message.body,
-            from_email=EMAIL_HOST_USER,
-            recipient_list=[client.email],
-            fail_silently=False,
+        for batch in chunked(reader, batch_size):
+            clients = []
+            for row in batch:
+                email = (row.get("email") or "").strip()
+                try:
+                    if len(email) > max_length:
+                        raise ValidationError("Слишком длинный адрес")
+                    validate(email)
+                except ValidationError:
+                    reject(row, "invalid", "некорректный email")
+                    continue
+                if email.lower() in known:
+                    reject(row, "duplicate", "клиент с таким email уже есть")
+                    continue
+                known.add(email.lower())
+                clients.append(
+                    Client(
+                        email=email,
+                        initials=(row.get("initials") or "").strip()[:100] or email,
+                        comment=(row.get("comment") or "").strip() or None,
+                        owner=owner,
+                    )
+                )
+            if clients:
+                Client.objects.bulk_create(clients, batch_size=batch_size)
+                report["created"] += len(clients)
+            if progress is not None:
+                progress(report)
+    finally:
+        invalidate_dashboard(owner.pk)
+    return report
+
+
+def cleanup_rejected_imports(directory, max_age):
+    """Удаляет файлы отклоненных строк импорта старше max_age (timedelta)"""
+    cutoff = time.time() - max_age.total_seconds()
+    for path in Path(directory).glob("*.csv"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+CLIENT_SEARCH_PAGE_SIZE = 20
+
+
+def search_clients(owner, query, page=1, page_size=CLIENT_SEARCH_PAGE_SIZE):
+    """Страница клиентов владельца, у которых email или Ф.И.О. начинается с query.
+
+    Поиск по префиксу без учета регистра обслуживают индексы
+    client_email_search_idx и client_initials_search_idx. Возвращает
+    список {"id", "text"} и признак следующей страницы.
+    """
+    queryset = Client.objects.filter(owner=owner)
+    if query:
+        queryset = queryset.filter(
+            Q(email__istartswith=query) | Q(initials__istartswith=query)
         )
-    except Exception as e:
-        mail_response = e
+    offset = (page - 1) * page_size
+    limit = offset + page_size + 1
+    rows = queryset.order_by("email", "pk").values_list("pk", "initials", "email")
+    rows = list(rows[offset:limit])
+    return {
+        "results": [
+            {"id": pk, "text": f"{initials} <{email}>"}
+            for pk, initials, email in rows[:page_size]
+        ],
+        "more": len(rows) > page_size,
+    }
+
+
+MAILING_SEARCH_PAGE_SIZE = 20
+
+
+def search_mailings(mailings, query, page=1, page_size=MAILING_SEARCH_PAGE_SIZE):
+    """Страница рассылок из mailings, название которых начинается с query.
+
+    Сначала новые рассылки. Возвращает список {"id", "text"} и признак
+    следующей страницы, как search_clients.
+    """
+    if query:
+        mailings = mailings.filter(title__istartswith=query)
+    offset = (page - 1) * page_size
+    limit = offset + page_size + 1
+    rows = mailings.order_by("-pk").values_list("pk", "title")
+    rows = list(rows[offset:limit])
+    return {
+        "results": [{"id": pk, "text": title} for pk, title in rows[:page_size]],
+        "more": len(rows) > page_size,
+    }
+
+
+def set_mailing_clients(mailing, client_ids, batch_size=RECIPIENT_CHUNK_SIZE):
+    """Сохраняет состав клиентов рассылки по разнице с текущим.
+
+    Лишние связи удаляются, новые добавляются bulk_create пачками, без
+    загрузки самих клиентов.
+    """
+    through = Mailing.clients.through
+    client_ids = set(client_ids)
+    current = set(
+        through.objects.filter(mailing_id=mailing.pk).values_list(
+            "client_id", flat=True
+        )
+    )
+    with transaction.atomic():
+        for removed in chunked(current - client_ids, batch_size):
+            through.objects.filter(
+                mailing_id=mailing.pk, client_id__in=removed
+            ).delete()
+        through.objects.bulk_create(
+            (
+                through(mailing_id=mailing.pk, client_id=client_id)
+                for client_id in client_ids - current
+            ),
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+    bump_object_versions(Mailing, [mailing.pk])
+
+
+def get_recipients(mailing):
+    """Получатели рассылки: только нужные для отправки поля, в порядке pk.
+
+    Если у рассылки есть сегмент, выбранные вручную клиенты объединяются
+    (UNION, без дублей) с клиентами по правилам сегмента в одном запросе;
+    каждая часть идет по своему индексу.
+    """
+    recipients = mailing.clients.only("id", "email").order_by()
+    if mailing.segment_id:
+        recipients = recipients.union(
+            Client.objects.filter(mailing.segment.get_filter())
+            .only("id", "email")
+            .order_by()
+        )
+    return recipients.order_by("pk")
 
-    AttemptToSend.objects.create(
+
+def iter_recipients(mailing, chunk_size=RECIPIENT_CHUNK_SIZE):
+    """Потоково перебирает получателей рассылки пачками по chunk_size.
+
+    На PostgreSQL используется серверный курсор, поэтому память не зависит от
+    числа получателей.
+    """
+    return get_recipients(mailing).iterator(chunk_size=chunk_size)
+
+
+def build_email(mailing, client):
+    """Собирает письмо рассылки для одного клиента"""
+    return EmailMessage(
+        subject=mailing.message.theme,
+        body=mailing.message.body,
+        from_email=EMAIL_HOST_USER,
+        to=[client.email],
+    )
+
+
+def make_attempt(mailing, client, mail_response):
+    """Создает (без сохранения) запись о попытке отправки по ответу сервера.
+
+    Время попытки фиксируется сразу, а не при сохранении буфера журнала,
+    чтобы запись и дневная статистика относились ко времени отправки.
+    """
+    return AttemptToSend(
         status_log=(
             AttemptToSend.SUCCESS if mail_response == 1 else AttemptToSend.FAILED
         ),
         server_response=mail_response if mail_response != 1 else "",
+        time_log_send=timezone.now(),
         mailing_list=mailing,
         client=client,
     )
 
 
+def dispatch_email(message, connection=None):
+    """Отправляет письмо, возвращает 1 при успехе или исключение отправки"""
+    try:
+        if connection is not None:
+            return connection.send(message)
+        return message.send(fail_silently=False)
+    except Exception as e:
+        return e
+
+
+def is_transient_error(error):
+    """Временная ли ошибка отправки: ответы 4xx, таймауты и сетевые ошибки.
+
+    Ответы 5xx и прочие ошибки считаются постоянными, повторять их бесполезно.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+
+def retry_delay(
+    attempts, base_delay=OUTBOX_RETRY_BASE_DELAY, max_delay=OUTBOX_RETRY_MAX_DELAY
+):
+    """Задержка перед повтором: экспонента от числа попыток со случайным разбросом"""
+    delay = min(max_delay, base_delay * 2 ** (attempts - 1))
+    return timedelta(seconds=random.uniform(delay / 2, delay))
+
+
+def schedule_retry(mailing, client, error):
+    """Ставит письмо с временной ошибкой прямой отправки в очередь OutboxMessage.
+
+    Прямая отправка (send_mail без --outbox, асинхронный движок) сама письма не
+    повторяет: повтор через retry_delay выполняет outbox_worker, неудачная
+    отправка засчитывается как первая попытка. Письмо, которое уже ждет в
+    очереди, не дублируется.
+    """
+    OutboxMessage.objects.bulk_create(
+        [
+            OutboxMessage(
+                mailing=mailing,
+                client=client,
+                attempts=1,
+                next_attempt_at=timezone.now() + retry_delay(1),
+                last_error=str(error),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def record_attempt(mailing, client, mail_response, log_writer=None):
+    """Записывает попытку отправки в журнал, временную ошибку ставит на повтор"""
+    if mail_response != 1 and is_transient_error(mail_response):
+        schedule_retry(mailing, client, mail_response)
+
+    attempt = make_attempt(mailing, client, mail_response)
+    if log_writer is not None:
+        log_writer.add(attempt)
+    else:
+        save_attempts([attempt])
+    return attempt
+
+
+def send_email(mailing, client, connection=None, log_writer=None):
+    """Функция отправки сообщений пользователям и занесение данных по результатам рассылки"""
+    mail_response = dispatch_email(build_email(mailing, client), connection)
+    return record_attempt(mailing, client, mail_response, log_writer)
+
+
+class DeliveryReport:
+    """Потокобезопасная сводка результатов отправки.
+
+    Память не зависит от размера аудитории: хранятся только счетчики по
+    статусам и случайная выборка задержек ограниченного размера (reservoir
+    sampling), по которой считаются перцентили. Результаты по получателям
+    передаются в on_result(email, status) в порядке получателей (см. emit).
+    """
+
+    LATENCY_SAMPLE_SIZE = 10000
+
+    def __init__(self, on_result=None, sample_size=LATENCY_SAMPLE_SIZE):
+        self._lock = threading.Lock()
+        self.on_result = on_result
+        self.sample_size = sample_size
+        self.counts = Counter()
+        self.total = 0
+        self.latencies = []
+        self.error = None
+        self.started = time.perf_counter()
+        self.finished = None
+        self._ready = []
+        self._next_index = 0
+
+    def add(self, index, client, attempt, latency=0.0):
+        """Учитывает попытку отправки получателю с порядковым номером index"""
+        with self._lock:
+            self.counts[attempt.status_log] += 1
+            self.total += 1
+            if len(self.latencies) < self.sample_size:
+                self.latencies.append(latency)
+            else:
+                slot = random.randrange(self.total)
+                if slot < self.sample_size:
+                    self.latencies[slot] = latency
+            if self.on_result is not None:
+                heapq.heappush(self._ready, (index, client.email, attempt.status_log))
+
+    def emit(self, final=False):
+        """Передает в on_result готовые результаты по порядку получателей.
+
+        Вызывается потоком, который раздает получателей, вне блокировки отчета,
+        поэтому медленный on_result не задерживает отправителей. Результат ждет,
+        пока готовы все предыдущие, так что в буфере только письма, обогнавшие
+        более ранние. final=True отдает остаток, даже если часть получателей
+        пропущена после ошибки.
+        """
+        while True:
+            with self._lock:
+                if not self._ready or (
+                    not final and self._ready[0][0] != self._next_index
+                ):
+                    return
+                index, email, status = heapq.heappop(self._ready)
+                self._next_index = index + 1
+            self.on_result(email, status)
+
+    def finish(self):
+        self.emit(final=True)
+        self.finished = time.perf_counter()
+        return self
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self):
+        """Писем в секунду"""
+        return len(self) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, percent):
+        """Задержка письма (в секундах) для заданного перцентиля по выборке"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    def fail(self, error):
+        with self._lock:
+            if self.error is None:
+                self.error = error
+
+    def __len__(self):
+        return self.total
+
+
+def _timed_send(mailing, client, connection, log_writer):
+    """send_email с замером задержки только SMTP-диалога, без записи журнала"""
+    message = build_email(mailing, client)
+    started = time.perf_counter()
+    mail_response = dispatch_email(message, connection)
+    latency = time.perf_counter() - started
+    return record_attempt(mailing, client, mail_response, log_writer), latency
+
+
+def _delivery_worker(mailing, tasks, report, log_writer):
+    """Поток-отправитель: своё SMTP-соединение и своё соединение с БД"""
+    try:
+        with MailConnection() as connection:
+            while (task := tasks.get()) is not None:
+                if report.error is not None:
+                    continue
+                index, client = task
+                try:
+                    report.add(
+                        index,
+                        client,
+                        *_timed_send(mailing, client, connection, log_writer),
+                    )
+                except Exception as e:
+                    report.fail(e)
+    finally:
+        db_connection.close()
+
+
+def _send_in_threads(mailing, clients, workers, report, log_writer):
+    # сообщение загружается один раз, а не в каждом потоке
+    mailing.message
+    tasks = queue.Queue(maxsize=workers * 2)
+    threads = [
+        threading.Thread(
+            target=_delivery_worker, args=(mailing, tasks, report, log_writer)
+        )
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for task in enumerate(clients):
+            tasks.put(task)
+            report.emit()
+    finally:
+        for _ in threads:
+            tasks.put(None)
+        for thread in threads:
+            thread.join()
+    if report.error is not None:
+        raise report.error
+
+
+def send_mailing(mailing, clients, workers=1, on_result=None):
+    """Функция отправки рассылки списку клиентов.
+
+    При workers > 1 получатели раздаются пулу потоков, у каждого потока одно
+    SMTP-соединение. Попытки пишутся в журнал пачками через AttemptLogWriter,
+    результат по каждому получателю передается в on_result(email, status) в
+    порядке clients.
+    Возвращает DeliveryReport.
+    """
+    report = DeliveryReport(on_result)
+    with AttemptLogWriter() as log_writer:
+        if workers > 1:
+            _send_in_threads(mailing, clients, workers, report, log_writer)
+        else:
+            with MailConnection() as connection:
+                for index, client in enumerate(clients):
+                    report.add(
+                        index,
+                        client,
+                        *_timed_send(mailing, client, connection, log_writer),
+                    )
+                    report.emit()
+    return report.finish()
+
+
+def chunked(iterable, size):
+    """Разбивает итерируемое на списки длиной не более size"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def enqueue_mailing(mailing, clients, batch_size=OUTBOX_BATCH_SIZE * 10):
+    """Ставит в очередь OutboxMessage по письму на каждого клиента рассылки.
+
+    Клиенты, письмо которым уже ждет отправки, повторно не добавляются.
+    Завершенные строки прошлого запуска удаляются: их результат уже есть в
+    журнале AttemptToSend, а очередь остается маленькой.
+    """
+    OutboxMessage.objects.filter(
+        mailing=mailing, state__in=[OutboxMessage.SENT, OutboxMessage.FAILED]
+    ).delete()
+    client_ids = clients.values_list("pk", flat=True).iterator(chunk_size=batch_size)
+    for chunk in chunked(client_ids, batch_size):
+        OutboxMessage.objects.bulk_create(
+            [OutboxMessage(mailing=mailing, client_id=pk) for pk in chunk],
+            ignore_conflicts=True,
+        )
+
+
+class LeasedQueue(ABC):
+    """Очередь строк LeasedQueueItem с арендой и повторами отправки.
+
+    Подклассы задают model, выборку строк (get_queryset) и сборку письма из
+    строки (build_message). Параметры берутся из настроек своей очереди.
+    """
+
+    model = None
+
+    def __init__(
+        self, batch_size, lease, max_attempts, retry_base_delay, retry_max_delay
+    ):
+        self.batch_size = batch_size
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    @abstractmethod
+    def build_message(self, item):
+        """Собирает письмо для отправки из строки очереди"""
+
+    def claim(self, worker, limit=None, lease=None):
+        """Забирает до limit готовых строк для обработчика worker.
+
+        Строки выбираются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+        параллельные обработчики не получают одни и те же строки. Вместе с
+        ожидающими забираются строки, аренда которых истекла (обработчик упал).
+        """
+        now = timezone.now()
+        model = self.model
+        with transaction.atomic():
+            ids = list(
+                model.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(state=model.PENDING, next_attempt_at__lte=now)
+                    | Q(state=model.SENDING, locked_until__lt=now)
+                )
+                .order_by("next_attempt_at")
+                .values_list("pk", flat=True)[: limit or self.batch_size]
+            )
+            model.objects.filter(pk__in=ids).update(
+                state=model.SENDING,
+                locked_by=worker,
+                locked_until=now + timedelta(seconds=lease or self.lease),
+                attempts=F("attempts") + 1,
+            )
+        return list(self.get_queryset().filter(pk__in=ids))
+
+    def deliver(self, worker, batch, connection, on_result=None, lease=None):
+        """Отправляет забранные строки и отмечает результат в очереди.
+
+        Перед каждой отправкой аренда строки продлевается на lease секунд; если
+        она уже истекла (строку могли забрать повторно), строка пропускается.
+        Результат записывается сразу после отправки, поэтому после падения
+        обработчика повторно уходят только неотправленные письма.
+
+        Строки с временной ошибкой возвращаются в очередь с задержкой
+        retry_delay, пока не исчерпано max_attempts попыток; с постоянной
+        ошибкой помечаются как неотправленные. Текст ошибки сохраняется в
+        last_error, on_result(item, mail_response) вызывается для каждой
+        отправленной строки. Возвращает pk строк по итоговому состоянию,
+        пропущенные - под SENDING.
+        """
+        model = self.model
+        lease = timedelta(seconds=lease or self.lease)
+        done = {model.SENT: [], model.FAILED: [], model.PENDING: [], model.SENDING: []}
+        for item in batch:
+            owned = model.objects.filter(pk=item.pk, locked_by=worker)
+            now = timezone.now()
+            renewed = owned.filter(state=model.SENDING, locked_until__gt=now).update(
+                locked_until=now + lease
+            )
+            if not renewed:
+                done[model.SENDING].append(item.pk)
+                continue
+            mail_response = dispatch_email(self.build_message(item), connection)
+            if mail_response == 1:
+                update = {"state": model.SENT, "locked_until": None}
+            elif (
+                is_transient_error(mail_response) and item.attempts < self.max_attempts
+            ):
+                update = {
+                    "state": model.PENDING,
+                    "locked_until": None,
+                    "last_error": str(mail_response),
+                    "next_attempt_at": timezone.now()
+                    + retry_delay(
+                        item.attempts, self.retry_base_delay, self.retry_max_delay
+                    ),
+                }
+            else:
+                update = {
+                    "state": model.FAILED,
+                    "locked_until": None,
+                    "last_error": str(mail_response),
+                }
+            owned.update(**update)
+            done[update["state"]].append(item.pk)
+            if on_result is not None:
+                on_result(item, mail_response)
+        return done
+
+
+class OutboxQueue(LeasedQueue):
+    """Очередь писем рассылок OutboxMessage"""
+
+    model = OutboxMessage
+
+    def get_queryset(self):
+        return OutboxMessage.objects.select_related("mailing__message", "client").only(
+            "mailing__message__theme",
+            "mailing__message__body",
+            "client__email",
+        )
+
+    def build_message(self, item):
+        return build_email(item.mailing, item.client)
+
+
+OUTBOX = OutboxQueue(
+    batch_size=OUTBOX_BATCH_SIZE,
+    lease=OUTBOX_LEASE_SECONDS,
+    max_attempts=OUTBOX_MAX_ATTEMPTS,
+    retry_base_delay=OUTBOX_RETRY_BASE_DELAY,
+    retry_max_delay=OUTBOX_RETRY_MAX_DELAY,
+)
+
+
+def deliver_outbox(worker, batch, connection, log_writer, lease=None):
+    """Отправляет забранные письма рассылок, каждая попытка пишется в журнал"""
+    return OUTBOX.deliver(
+        worker,
+        batch,
+        connection,
+        on_result=lambda item, mail_response: log_writer.add(
+            make_attempt(item.mailing, item.client, mail_response)
+        ),
+        lease=lease,
+    )
+
+
+def enqueue_email(subject, body, to, from_email=None, html_body=""):
+    """Ставит служебное письмо в очередь QueuedEmail после фиксации транзакции.
+
+    Если транзакция откатится (например, регистрация не сохранилась), письмо не
+    появится; вне транзакции письмо ставится сразу. Отправляет его команда
+    email_worker.
+    """
+    transaction.on_commit(
+        lambda: QueuedEmail.objects.create(
+            subject=subject,
+            body=body,
+            html_body=html_body or "",
+            from_email=from_email or EMAIL_HOST_USER or "",
+            to=to,
+        )
+    )
+
+
+def build_queued_email(item):
+    """Собирает служебное письмо из строки очереди"""
+    message = EmailMultiAlternatives(
+        subject=item.subject,
+        body=item.body,
+        from_email=item.from_email or None,
+        to=[item.to],
+    )
+    if item.html_body:
+        message.attach_alternative(item.html_body, "text/html")
+    return message
+
+
+class EmailQueue(LeasedQueue):
+    """Очередь служебных писем QueuedEmail"""
+
+    model = QueuedEmail
+
+    def build_message(self, item):
+        return build_queued_email(item)
+
+
+EMAIL_QUEUE = EmailQueue(
+    batch_size=EMAIL_QUEUE_BATCH_SIZE,
+    lease=EMAIL_QUEUE_LEASE_SECONDS,
+    max_attempts=EMAIL_QUEUE_MAX_ATTEMPTS,
+    retry_base_delay=EMAIL_QUEUE_RETRY_BASE_DELAY,
+    retry_max_delay=EMAIL_QUEUE_RETRY_MAX_DELAY,
+)
+
+
+def get_outbox_progress(mailing):
+    """Счетчики очереди рассылки одним запросом"""
+    return OutboxMessage.objects.filter(mailing=mailing).aggregate(
+        queued=Count(
+            "pk", filter=Q(state__in=[OutboxMessage.PENDING, OutboxMessage.SENDING])
+        ),
+        sent=Count("pk", filter=Q(state=OutboxMessage.SENT)),
+        failed=Count("pk", filter=Q(state=OutboxMessage.FAILED)),
+    )
+
+
 def update_status(mailing):
     """Функция изменения статуса рассылки с учетом текущей даты"""
     now = timezone.now()
-    if mailing.finished_at < now:
+    if mailing.finished_at and mailing.finished_at < now:
         mailing.status_mail = "COMPLETED"
     elif mailing.status_mail != "COMPLETED":
         mailing.status_mail = "STARTED"
     mailing.save()
 
 
-def get_list_by_owner(owner_id, model):
-    list_by_owner = model.objects.filter(owner=owner_id)
-    return list_by_owner
+def add_period(moment, period, anchor_day=None):
+    """Сдвигает момент времени на один период рассылки, для разовой возвращает None.
+
+    Считается в местном времени (TIME_ZONE), поэтому рассылка приходит в тот же
+    час и после перехода на летнее время. Ежемесячная рассылка приходится на
+    anchor_day (по умолчанию день moment), а в коротких месяцах - на последний
+    день месяца.
+    """
+    moment = timezone.localtime(moment)
+    if period == Mailing.DAILY:
+        return moment + timedelta(days=1)
+    if period == Mailing.WEEKLY:
+        return moment + timedelta(weeks=1)
+    if period == Mailing.MONTHLY:
+        year, month = divmod(moment.month, 12)
+        year += moment.year
+        month += 1
+        day = min(anchor_day or moment.day, calendar.monthrange(year, month)[1])
+        return moment.replace(year=year, month=month, day=day)
+    return None
+
+
+def get_next_run(mailing, now):
+    """Время следующего запуска рассылки после now.
+
+    Отсчитывается от текущего next_run_at (если его нет - от started_at), чтобы
+    запуски не уползали по времени; ежемесячные привязаны к местному дню
+    started_at, поэтому рассылка 31-го числа после февраля снова приходит
+    31-го. Пропущенные запуски (планировщик не работал) не догоняются. После
+    finished_at и для разовых рассылок возвращает None.
+    """
+    anchor_day = (
+        timezone.localtime(mailing.started_at).day if mailing.started_at else None
+    )
+    next_run = mailing.next_run_at or mailing.started_at or now
+    while next_run is not None and next_run <= now:
+        next_run = add_period(next_run, mailing.period_mail, anchor_day)
+    if next_run is not None and mailing.finished_at and next_run > mailing.finished_at:
+        return None
+    return next_run
+
+
+def schedule_mailing(mailing, now):
+    """Назначает next_run_at после создания, правки или включения рассылки.
+
+    Периодическая рассылка ставится на ближайший после now запуск по сетке от
+    started_at. Разовую запускает кнопка отправки, поэтому ее next_run_at не
+    меняется: уже отправленная разовая рассылка при включении снова не уходит.
+    """
+    if mailing.period_mail != Mailing.SINGLE:
+        mailing.next_run_at = None
+        mailing.next_run_at = get_next_run(mailing, now)
+    return mailing.next_run_at
+
+
+def get_due_mailings(now):
+    """Рассылки, время запуска которых наступило (диапазон по индексу next_run_at).
+
+    Отключенные рассылки сохраняют next_run_at, но не запускаются.
+    """
+    return (
+        Mailing.objects.filter(next_run_at__lte=now)
+        .exclude(status_mail="COMPLETED")
+        .select_related("segment")
+        .order_by("next_run_at")
+    )
+
+
+def request_run(mailing, now):
+    """Назначает запуск рассылки на now (кнопка отправки).
+
+    Письма раздает планировщик send_mail, а не запрос. Обновление условное:
+    уже наступивший запуск не переносится, поэтому повторное нажатие не
+    откладывает рассылку.
+    """
+    Mailing.objects.filter(pk=mailing.pk).filter(
+        Q(next_run_at__isnull=True) | Q(next_run_at__gt=now)
+    ).update(next_run_at=now)
+
+
+def claim_run(mailing, now):
+    """Переносит next_run_at рассылки на следующий период.
+
+    Перенос условный (по старому значению next_run_at), поэтому из нескольких
+    одновременно работающих планировщиков запуск достается только одному.
+    Возвращает True, если запуск достался этому вызову.
+    """
+    next_run = get_next_run(mailing, now)
+    claimed = Mailing.objects.filter(
+        pk=mailing.pk, next_run_at=mailing.next_run_at
+    ).update(next_run_at=next_run)
+    mailing.next_run_at = next_run
+    return claimed == 1
+
+
+def dashboard_cache_key(owner_id=None):
+    if owner_id is None:
+        return "dashboard:global"
+    return f"dashboard:owner:{owner_id}"
+
+
+def count_dashboard(owner_id=None):
+    """Счетчики главной страницы (все или одного владельца) одним запросом"""
+    owner_filter = "TRUE" if owner_id is None else "owner_id = %s"
+    owner_params = [] if owner_id is None else [owner_id]
+    owned_mailings = f"SELECT id FROM {Mailing._meta.db_table} WHERE {owner_filter}"
+    sql = f"""
+        SELECT
+            (SELECT COUNT(*) FROM {Message._meta.db_table} WHERE {owner_filter}),
+            (SELECT COUNT(*) FROM {Mailing._meta.db_table} WHERE {owner_filter}),
+            (SELECT COUNT(*) FROM {Mailing._meta.db_table}
+                WHERE {owner_filter} AND status_mail = %s),
+            (SELECT COUNT(*) FROM {Client._meta.db_table} WHERE {owner_filter}),
+            (SELECT COALESCE(SUM(sent), 0) FROM {MailingDailyStats._meta.db_table}
+                WHERE mailing_id IN ({owned_mailings})),
+            (SELECT COALESCE(SUM(failed), 0) FROM {MailingDailyStats._meta.db_table}
+                WHERE mailing_id IN ({owned_mailings}))
+    """
+    params = owner_params * 3 + ["STARTED"] + owner_params * 3
+    with db_connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        (
+            messages_count,
+            mailings_count,
+            active_count,
+            clients_count,
+            sent_count,
+            failed_count,
+        ) = cursor.fetchone()
+    return {
+        "messages_count": messages_count,
+        "mailings_count": mailings_count,
+        "active_mailings_count": active_count,
+        "clients_count": clients_count,
+        "sent_count": sent_count,
+        "failed_count": failed_count,
+    }
+
+
+def get_dashboard_counters(owner_id=None):
+    """Счетчики главной страницы из кеша, при промахе - одним запросом к БД"""
+    key = dashboard_cache_key(owner_id)
+    counters = cache.get(key)
+    if counters is None:
+        counters = count_dashboard(owner_id)
+        cache.set(key, counters, DASHBOARD_CACHE_TIMEOUT)
+    return counters
+
+
+async def aget_dashboard_counters(owner_id=None):
+    """Асинхронный вариант get_dashboard_counters.
+
+    У сырого курсора нет асинхронного API, поэтому при промахе кеша единый
+    запрос счетчиков выполняется в потоке.
+    """
+    key = dashboard_cache_key(owner_id)
+    counters = await cache.aget(key)
+    if counters is None:
+        counters = await sync_to_async(count_dashboard)(owner_id)
+        await cache.aset(key, counters, DASHBOARD_CACHE_TIMEOUT)
+    return counters
+
+
+def invalidate_dashboard(owner_id):
+    """Сбрасывает общие счетчики и счетчики владельца"""
+    cache.delete_many([dashboard_cache_key(), dashboard_cache_key(owner_id)])
+
+
+def object_version_key(model, pk):
+    return f"version:{model._meta.label_lower}:{pk}"
+
+
+def get_object_version(model, pk):
+    """Текущая версия объекта; меняется при каждом изменении объекта"""
+    return cache.get_or_set(object_version_key(model, pk), uuid4().hex, None)
+
+
+def bump_object_versions(model, pks):
+    """Выдает объектам новые версии, старые закешированные страницы больше не читаются"""
+    cache.set_many(
+        {object_version_key(model, pk): uuid4().hex for pk in pks}, timeout=None
+    )
+
+
+def detail_cache_key(model, pk, user_id, access, csrf_secret):
+    """Ключ кеша страницы объекта.
+
+    Включает версию объекта, пользователя с его ролями и правами (access) и
+    CSRF-секрет, поэтому страница не достанется другому пользователю и
+    устаревает сразу после изменения объекта.
+    """
+    viewer = f"{user_id}:{','.join(sorted(access))}:{csrf_secret}"
+    return ":".join(
+        [
+            "detail",
+            model._meta.label_lower,
+            str(pk),
+            get_object_version(model, pk),
+            md5(viewer.encode(), usedforsecurity=False).hexdigest(),
+        ]
+    )
+
+
+LOG_CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_log_cursor(log):
+    """Курсор постраничного вывода журнала: время попытки в микросекундах и pk"""
+    delta = log.time_log_send - LOG_CURSOR_EPOCH
+    return f"{delta // timedelta(microseconds=1)}_{log.pk}"
+
+
+def decode_log_cursor(value):
+    """Разбирает курсор журнала, для некорректного значения возвращает None"""
+    try:
+        microseconds, pk = (int(part) for part in value.split("_"))
+        return LOG_CURSOR_EPOCH + timedelta(microseconds=microseconds), pk
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def seek_logs(queryset, cursor):
+    """Записи журнала после курсора в порядке (-time_log_send, -pk).
+
+    Keyset-пагинация: условие по индексированным колонкам вместо OFFSET, поэтому
+    любая страница стоит одинаково.
+    """
+    queryset = queryset.order_by("-time_log_send", "-pk")
+    if cursor is None:
+        return queryset
+    time_log_send, pk = cursor
+    return queryset.filter(
+        Q(time_log_send__lt=time_log_send) | Q(time_log_send=time_log_send, pk__lt=pk)
+    )
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    """Генератор CSV для StreamingHttpResponse.
+
+    Отдает заголовок (с BOM, чтобы Excel понял UTF-8) и затем строки пачками по
+    chunk_size, не накапливая всю выгрузку в памяти.
+    """
+    writer = csv.writer(Echo())
+    yield "\ufeff" + writer.writerow(header)
+    for batch in chunked(rows, chunk_size):
+        yield "".join(writer.writerow(row) for row in batch)
+
+
+def export_clients(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки выгрузки клиентов; читаются серверным курсором"""
+    rows = (
+        queryset.order_by("pk")
+        .values_list("email", "initials", "comment", "owner__email", "created_at")
+        .iterator(chunk_size=chunk_size)
+    )
+    for email, initials, comment, owner_email, created_at in rows:
+        yield (
+            email,
+            initials,
+            comment or "",
+            owner_email or "",
+            timezone.localtime(created_at).isoformat(),
+        )
+
+
+def export_logs(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки выгрузки журнала попыток; читаются серверным курсором"""
+    rows = (
+        queryset.order_by("-time_log_send", "-pk")
+        .values_list(
+            "time_log_send",
+            "mailing_list__title",
+            "client__email",
+            "status_log",
+            "server_response",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for time_log_send, title, email, status, server_response in rows:
+        yield (
+            timezone.localtime(time_log_send).isoformat(),
+            title,
+            email,
+            status,
+            server_response or "",
+        )
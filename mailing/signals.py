@@ -0,0 +1,61 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from mailing.models import Client, Mailing, Message, Segment
+from mailing.services import bump_object_versions, invalidate_dashboard
+
+
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=Message)
+@receiver([post_save, post_delete], sender=Mailing)
+def reset_dashboard_counters(sender, instance, **kwargs):
+    """Сбрасывает кеш счетчиков главной страницы при изменении данных"""
+    invalidate_dashboard(instance.owner_id)
+
+
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=Message)
+@receiver([post_save, post_delete], sender=Mailing)
+def bump_version(sender, instance, **kwargs):
+    """Новая версия объекта делает недействительными кешированные страницы"""
+    bump_object_versions(sender, [instance.pk])
+
+
+@receiver(post_save, sender=Message)
+def bump_message_mailings(sender, instance, **kwargs):
+    """Страница рассылки показывает ее сообщение"""
+    mailing_ids = Mailing.objects.filter(message_id=instance.pk).values_list(
+        "pk", flat=True
+    )
+    bump_object_versions(Mailing, mailing_ids)
+
+
+@receiver([post_save, pre_delete], sender=Client)
+def bump_client_mailings(sender, instance, **kwargs):
+    """Страница рассылки показывает ее клиентов (до удаления связи еще видны)"""
+    mailing_ids = Mailing.clients.through.objects.filter(
+        client_id=instance.pk
+    ).values_list("mailing_id", flat=True)
+    bump_object_versions(Mailing, mailing_ids)
+
+
+@receiver(m2m_changed, sender=Mailing.clients.through)
+def bump_mailing_clients(sender, instance, action, reverse, pk_set, **kwargs):
+    """Состав клиентов рассылки изменился"""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        bump_object_versions(Mailing, [instance.pk])
+    elif action == "pre_clear":
+        bump_object_versions(
+            Mailing, instance.mailing_clients.values_list("pk", flat=True)
+        )
+    else:
+        bump_object_versions(Mailing, pk_set)
+
+
+@receiver(post_save, sender=Segment)
+def bump_segment_mailings(sender, instance, **kwargs):
+    """Страница рассылки показывает ее сегмент"""
+    bump_object_versions(Mailing, instance.mailings.values_list("pk", flat=True))
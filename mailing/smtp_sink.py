@@ -0,0 +1,95 @@
+import asyncio
+import random
+import threading
+
+
+class SMTPSink:
+    """Локальный SMTP-сервер на asyncio, который принимает и отбрасывает письма.
+
+    Нужен для проверки и замеров отправки без настоящего почтового сервера.
+    Запускается внутри работающего цикла событий (start/stop) или в
+    отдельном потоке (run_in_thread). latency (в секундах) задерживает ответ
+    на каждое письмо, failure_rate - доля писем, отклоняемых временной ошибкой.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.received = 0
+        self.rejected = 0
+        self.connections = 0
+        self._server = None
+        self._loop = None
+        self._thread = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 localhost SMTP sink\r\n")
+        await writer.drain()
+        try:
+            while line := await reader.readline():
+                command = line[:4].upper()
+                if command == b"EHLO":
+                    writer.write(b"250-localhost\r\n250 8BITMIME\r\n")
+                elif command == b"DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await writer.drain()
+                    while await reader.readline() not in (b".\r\n", b""):
+                        pass
+                    writer.write(await self.accept_message())
+                elif command == b"QUIT":
+                    writer.write(b"221 Bye\r\n")
+                    await writer.drain()
+                    break
+                else:
+                    writer.write(b"250 OK\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def accept_message(self):
+        """Ответ сервера на принятое письмо"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            self.rejected += 1
+            return b"451 Try again later\r\n"
+        self.received += 1
+        return b"250 OK: queued\r\n"
+
+    def run_in_thread(self):
+        """Запускает сервер в фоновом потоке и возвращает себя для with"""
+        started = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def __enter__(self):
+        return self.run_in_thread()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
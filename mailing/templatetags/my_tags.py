@@ -1,5 +1,7 @@
 from django import template
 
+from users.services import get_user_roles
+
 register = template.Library()
 
 
@@ -12,4 +14,4 @@ def media_filter(path):
 
 @register.filter(name="has_group")
 def has_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
+    return group_name in get_user_roles(user)
@@ -0,0 +1,66 @@
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from mailing.models import AttemptToSend, MailingDailyStats
+from mailing.services import archive_attempts, make_attempt, save_attempts
+
+from .utils import create_mailing, create_owner, utc
+
+
+@override_settings(TIME_ZONE="UTC")
+class ArchiveAttemptsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mailing = create_mailing(create_owner(), clients=1)
+        client = mailing.clients.get()
+        attempts = []
+        for day in (1, 1, 2, 20):
+            attempt = make_attempt(mailing, client, 1)
+            attempt.time_log_send = utc(2026, 3, day, 12)
+            attempts.append(attempt)
+        save_attempts(attempts)
+
+    def setUp(self):
+        self.archive_dir = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+    def read(self, day):
+        path = self.archive_dir / f"attempts-2026-03-{day:02}.jsonl.gz"
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            return [json.loads(line) for line in archive]
+
+    def test_moves_old_attempts_in_batches(self):
+        cutoff = utc(2026, 3, 10)
+        self.assertEqual(archive_attempts(cutoff, self.archive_dir, batch_size=2), 2)
+        self.assertEqual(archive_attempts(cutoff, self.archive_dir, batch_size=2), 1)
+        self.assertEqual(archive_attempts(cutoff, self.archive_dir, batch_size=2), 0)
+
+        self.assertEqual(len(self.read(1)), 2)
+        self.assertEqual(self.read(2)[0]["status_log"], AttemptToSend.SUCCESS)
+        self.assertEqual(
+            list(AttemptToSend.objects.values_list("time_log_send", flat=True)),
+            [utc(2026, 3, 20, 12)],
+        )
+        self.assertEqual(
+            sum(MailingDailyStats.objects.values_list("sent", flat=True)), 4
+        )
+
+    def test_dry_run_keeps_attempts(self):
+        stdout = StringIO()
+        call_command(
+            "archive_logs",
+            "--days",
+            "0",
+            "--dir",
+            str(self.archive_dir),
+            "--dry-run",
+            stdout=stdout,
+        )
+        self.assertIn(": 4", stdout.getvalue())
+        self.assertEqual(AttemptToSend.objects.count(), 4)
+        self.assertFalse(any(self.archive_dir.iterdir()))
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from mailing.models import Client
+
+from .utils import create_mailing, create_owner
+
+
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=3)
+        cls.other_mailing = create_mailing(create_owner("other"), clients=1)
+
+    def setUp(self):
+        cache.clear()
+        self.async_client.cookies["csrftoken"] = "a" * 32
+
+    async def test_list_is_owner_scoped(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(reverse("mailing:clients_all_async"))
+        self.assertEqual(
+            [client.pk for client in response.context["clients"]],
+            [client.pk async for client in Client.objects.owned_by(self.owner)],
+        )
+        self.assertEqual(response.context["page_obj"].paginator.count, 3)
+
+    async def test_detail_is_owner_only(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(
+            reverse("mailing:mailing_details_async", args=[self.mailing.pk])
+        )
+        self.assertContains(response, self.mailing.title)
+        response = await self.async_client.get(
+            reverse("mailing:mailing_details_async", args=[self.other_mailing.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_anonymous_is_redirected(self):
+        response = await self.async_client.get(reverse("mailing:mailings_all_async"))
+        self.assertEqual(response.status_code, 302)
+
+    async def test_bad_page_is_404(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(
+            reverse("mailing:clients_all_async"), {"page": 5}
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,28 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from mailing.models import Client, Mailing, Message
+from users.models import User
+
+
+class BenchDeliveryTest(TestCase):
+    def bench(self, *args):
+        stdout = StringIO()
+        call_command("bench_delivery", "--clients", "5", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_removes_bench_data(self):
+        output = self.bench()
+        self.assertIn("Успешно: 5, не успешно: 0", output)
+        self.assertFalse(User.objects.filter(email="bench@localhost").exists())
+        self.assertFalse(Client.objects.exists())
+        self.assertFalse(Mailing.objects.exists())
+        self.assertFalse(Message.objects.exists())
+
+    def test_keep_leaves_bench_data(self):
+        self.bench("--keep")
+        self.assertEqual(
+            Client.objects.filter(owner__email="bench@localhost").count(), 5
+        )
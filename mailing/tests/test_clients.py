@@ -0,0 +1,92 @@
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+
+from mailing.forms import ClientAutocompleteWidget, MailingForm
+from mailing.models import Client, Mailing
+from mailing.services import search_clients, set_mailing_clients
+
+from .utils import create_mailing, create_owner
+
+
+class ClientSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=5)
+        Client.objects.create(
+            email="anna@example.com", initials="Анна", owner=cls.owner
+        )
+        Client.objects.create(
+            email="anna@other.com", initials="Анна", owner=create_owner("other")
+        )
+
+    def test_prefix_search_is_owner_scoped(self):
+        for query in ("ANNA", "Анна"):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    search_clients(self.owner, query)["results"],
+                    [
+                        {
+                            "id": Client.objects.get(email="anna@example.com").pk,
+                            "text": "Анна <anna@example.com>",
+                        }
+                    ],
+                )
+
+    def test_pages(self):
+        first = search_clients(self.owner, "client", page_size=3)
+        second = search_clients(self.owner, "client", page=2, page_size=3)
+        self.assertTrue(first["more"])
+        self.assertFalse(second["more"])
+        self.assertEqual(
+            [result["text"] for result in first["results"] + second["results"]],
+            [f"Клиент {index} <client{index}@example.com>" for index in range(5)],
+        )
+
+    def test_search_view(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(
+            reverse("mailing:client_search"), {"q": "anna", "page": "x"}
+        )
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_form_renders_only_selected_clients(self):
+        selected = self.mailing.clients.order_by("pk").first()
+        form = MailingForm(instance=self.mailing, user=self.owner)
+        form.initial["clients"] = [selected.pk]
+        html = str(form["clients"])
+        self.assertIn(selected.email, html)
+        self.assertNotIn("anna@example.com", html)
+
+    def test_selected_ids_come_in_one_field(self):
+        widget = ClientAutocompleteWidget()
+        self.assertEqual(
+            widget.value_from_datadict(
+                QueryDict("clients=1,2&clients=3"), {}, "clients"
+            ),
+            ["1", "2", "3"],
+        )
+
+
+class SetMailingClientsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=4)
+
+    def test_only_difference_is_written(self):
+        clients = list(self.mailing.clients.order_by("pk"))
+        extra = Client.objects.create(email="extra@example.com", owner=self.owner)
+        keep = [client.pk for client in clients[:2]]
+
+        set_mailing_clients(self.mailing, keep + [extra.pk], batch_size=1)
+        self.assertEqual(
+            set(self.mailing.clients.values_list("pk", flat=True)), {*keep, extra.pk}
+        )
+
+        # существующие связи не пересоздаются
+        through = Mailing.clients.through
+        links = set(through.objects.values_list("pk", flat=True))
+        set_mailing_clients(self.mailing, keep + [extra.pk])
+        self.assertEqual(set(through.objects.values_list("pk", flat=True)), links)
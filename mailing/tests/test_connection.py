@@ -0,0 +1,39 @@
+import socket
+
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase
+
+from mailing.services import MailConnection
+
+from .utils import ScriptedSink, sink_settings
+
+
+def make_message(index=0):
+    return EmailMessage("Тема", "Текст", "from@example.com", [f"to{index}@example.com"])
+
+
+class MailConnectionTest(SimpleTestCase):
+    def test_one_connection_for_many_messages(self):
+        with ScriptedSink() as sink, sink_settings(sink):
+            with MailConnection(max_messages=0) as connection:
+                results = [connection.send(make_message(index)) for index in range(5)]
+        self.assertEqual(results, [1] * 5)
+        self.assertEqual(sink.received, 5)
+        self.assertEqual(sink.connections, 1)
+
+    def test_reconnects_after_max_messages(self):
+        with ScriptedSink() as sink, sink_settings(sink):
+            with MailConnection(max_messages=2) as connection:
+                for index in range(5):
+                    connection.send(make_message(index))
+        self.assertEqual(sink.received, 5)
+        self.assertEqual(sink.connections, 3)
+
+    def test_reconnects_when_server_drops_connection(self):
+        with ScriptedSink() as sink, sink_settings(sink):
+            with MailConnection(max_messages=0) as connection:
+                connection.send(make_message(0))
+                connection.backend.connection.sock.shutdown(socket.SHUT_RDWR)
+                self.assertEqual(connection.send(make_message(1)), 1)
+        self.assertEqual(sink.received, 2)
+        self.assertEqual(sink.connections, 2)
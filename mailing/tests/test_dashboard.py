@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from mailing.models import Client
+from mailing.services import (get_dashboard_counters, make_attempt,
+                              save_attempts)
+
+from .utils import create_mailing, create_owner
+
+
+class DashboardCountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.other = create_owner("other")
+        cls.mailing = create_mailing(cls.owner, clients=2)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counters_are_cached(self):
+        with self.assertNumQueries(1):
+            counters = get_dashboard_counters(self.owner.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dashboard_counters(self.owner.pk), counters)
+        self.assertEqual(counters["clients_count"], 2)
+        self.assertEqual(counters["mailings_count"], 1)
+
+    def test_saved_client_resets_owner_and_global_counters(self):
+        get_dashboard_counters()
+        get_dashboard_counters(self.owner.pk)
+        get_dashboard_counters(self.other.pk)
+        Client.objects.create(email="new@example.com", owner=self.owner)
+
+        self.assertEqual(get_dashboard_counters(self.owner.pk)["clients_count"], 3)
+        self.assertEqual(get_dashboard_counters()["clients_count"], 3)
+        with self.assertNumQueries(0):
+            get_dashboard_counters(self.other.pk)
+
+    def test_deleted_mailing_resets_counters(self):
+        get_dashboard_counters(self.owner.pk)
+        create_mailing(self.owner).delete()
+        self.assertEqual(get_dashboard_counters(self.owner.pk)["messages_count"], 2)
+        self.assertEqual(get_dashboard_counters(self.owner.pk)["mailings_count"], 1)
+
+    def test_saved_attempts_reset_sent_counters(self):
+        get_dashboard_counters(self.owner.pk)
+        client = self.mailing.clients.first()
+        save_attempts([make_attempt(self.mailing, client, 1)])
+        self.assertEqual(get_dashboard_counters(self.owner.pk)["sent_count"], 1)
@@ -0,0 +1,153 @@
+from functools import partial
+
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from mailing.async_delivery import AsyncMailConnection, asend_mailing
+from mailing.models import AttemptToSend, Client
+from mailing.services import (DeliveryReport, get_recipients, iter_recipients,
+                              send_mailing)
+
+from .utils import ScriptedSink, create_mailing, create_owner
+
+
+class SendMailingTest(TransactionTestCase):
+    def setUp(self):
+        self.mailing = create_mailing(create_owner(), clients=60)
+        self.emails = list(
+            self.mailing.clients.order_by("pk").values_list("email", flat=True)
+        )
+
+    def test_results_follow_recipient_order(self):
+        for workers in (1, 8):
+            with self.subTest(workers=workers):
+                mail.outbox = []
+                results = []
+                report = send_mailing(
+                    self.mailing,
+                    iter_recipients(self.mailing),
+                    workers=workers,
+                    on_result=lambda email, status: results.append(email),
+                )
+                self.assertEqual(results, self.emails)
+                self.assertEqual(report.counts[AttemptToSend.SUCCESS], 60)
+                self.assertEqual(len(mail.outbox), 60)
+
+
+class RecipientsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mailing = create_mailing(create_owner(), clients=7)
+
+    def test_streams_only_needed_fields_in_order(self):
+        with self.assertNumQueries(1):
+            recipients = list(iter_recipients(self.mailing, chunk_size=3))
+        self.assertEqual(
+            [client.email for client in recipients],
+            list(self.mailing.clients.order_by("pk").values_list("email", flat=True)),
+        )
+        self.assertIn("initials", recipients[0].get_deferred_fields())
+
+
+class DeliveryReportTest(SimpleTestCase):
+    def test_emits_in_recipient_order_outside_lock(self):
+        def on_result(email, status):
+            self.assertFalse(report._lock.locked())
+            results.append(email)
+
+        results = []
+        report = DeliveryReport(on_result)
+        for index in (2, 0, 3, 1):
+            report.add(
+                index,
+                Client(email=f"client{index}@example.com"),
+                AttemptToSend(status_log=AttemptToSend.SUCCESS),
+            )
+            report.emit()
+            if index == 0:
+                self.assertEqual(results, ["client0@example.com"])
+        self.assertEqual(results, [f"client{index}@example.com" for index in range(4)])
+        self.assertEqual(report._ready, [])
+
+    def test_latency_sample_is_bounded(self):
+        report = DeliveryReport(sample_size=10)
+        for index in range(1000):
+            report.add(
+                index,
+                Client(email=f"client{index}@example.com"),
+                AttemptToSend(status_log=AttemptToSend.SUCCESS),
+                latency=index / 1000,
+            )
+        self.assertEqual(len(report), 1000)
+        self.assertEqual(len(report.latencies), 10)
+        self.assertEqual(report._ready, [])
+        self.assertLessEqual(report.percentile(50), report.percentile(95))
+
+    def test_finish_emits_rest_after_gap(self):
+        results = []
+        report = DeliveryReport(lambda email, status: results.append(status))
+        report.add(
+            1,
+            Client(email="client1@example.com"),
+            AttemptToSend(status_log=AttemptToSend.FAILED),
+        )
+        report.emit()
+        self.assertEqual(results, [])
+        report.finish()
+        self.assertEqual(results, [AttemptToSend.FAILED])
+        self.assertEqual(report.counts, {AttemptToSend.FAILED: 1})
+
+
+class AsyncSendMailingTest(TransactionTestCase):
+    def setUp(self):
+        self.mailing = create_mailing(create_owner(), clients=30)
+
+    def send(self, sink, **kwargs):
+        results = []
+        report = async_to_sync(asend_mailing)(
+            self.mailing,
+            get_recipients(self.mailing).aiterator(),
+            connection_factory=partial(
+                AsyncMailConnection,
+                sink.host,
+                sink.port,
+                username="",
+                password="",
+                use_tls=False,
+                start_tls=False,
+                **kwargs,
+            ),
+            concurrency=5,
+            on_result=lambda email, status: results.append(email),
+        )
+        return report, results
+
+    def test_sends_concurrently_over_few_connections(self):
+        with ScriptedSink() as sink:
+            report, results = self.send(sink)
+        self.assertEqual(report.counts[AttemptToSend.SUCCESS], 30)
+        self.assertEqual(sink.received, 30)
+        self.assertEqual(sink.connections, 5)
+        self.assertEqual(
+            results,
+            list(self.mailing.clients.order_by("pk").values_list("email", flat=True)),
+        )
+        self.assertEqual(AttemptToSend.objects.count(), 30)
+
+    def test_reconnects_after_max_messages(self):
+        with ScriptedSink() as sink:
+            report, _ = self.send(sink, max_messages=2)
+        self.assertEqual(sink.received, 30)
+        # не больше двух писем на соединение; у каждого из 5 отправителей
+        # последнее соединение может быть неполным
+        self.assertGreaterEqual(sink.connections, 15)
+        self.assertLessEqual(sink.connections, 20)
+
+    def test_failures_are_logged(self):
+        with ScriptedSink([b"550 No such user\r\n"]) as sink:
+            report, _ = self.send(sink)
+        self.assertEqual(report.counts[AttemptToSend.FAILED], 1)
+        self.assertEqual(
+            AttemptToSend.objects.filter(status_log=AttemptToSend.FAILED).count(), 1
+        )
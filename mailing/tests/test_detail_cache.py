@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from mailing.models import Client, Mailing
+
+from .utils import create_mailing, create_owner
+
+
+class DetailCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=1)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.owner)
+        self.client.cookies["csrftoken"] = "a" * 32
+        self.url = reverse("mailing:mailing_details", args=[self.mailing.pk])
+
+    def test_page_is_cached_until_mailing_changes(self):
+        self.client.get(self.url)
+        # update() не отправляет сигналы, поэтому страница остается в кеше
+        Mailing.objects.filter(pk=self.mailing.pk).update(title="Без сигнала")
+        self.assertNotContains(self.client.get(self.url), "Без сигнала")
+
+        self.mailing.title = "Новое название"
+        self.mailing.save()
+        self.assertContains(self.client.get(self.url), "Новое название")
+
+    def test_client_change_invalidates_mailing_page(self):
+        self.client.get(self.url)
+        client = self.mailing.clients.get()
+        client.email = "changed@example.com"
+        client.save()
+        self.assertContains(self.client.get(self.url), "changed@example.com")
+
+        self.mailing.clients.add(
+            Client.objects.create(email="added@example.com", owner=self.owner)
+        )
+        self.assertContains(self.client.get(self.url), "added@example.com")
+
+    def test_page_is_not_shared_between_users(self):
+        self.client.get(self.url)
+        self.client.force_login(create_owner("other"))
+        self.client.cookies["csrftoken"] = "a" * 32
+        self.assertEqual(self.client.get(self.url).status_code, 404)
@@ -0,0 +1,58 @@
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from mailing.models import QueuedEmail
+from mailing.services import EMAIL_QUEUE, MailConnection, enqueue_email
+
+from .utils import ScriptedSink, sink_settings
+
+
+class EnqueueEmailTest(TestCase):
+    def test_queued_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            enqueue_email("Тема", "Текст", "user@example.com", html_body="<b>Текст</b>")
+            self.assertFalse(QueuedEmail.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+        item = QueuedEmail.objects.get()
+        self.assertEqual(
+            (item.to, item.state, item.html_body),
+            ("user@example.com", QueuedEmail.PENDING, "<b>Текст</b>"),
+        )
+
+    def test_not_queued_after_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                enqueue_email("Тема", "Текст", "user@example.com")
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertFalse(QueuedEmail.objects.exists())
+
+
+class EmailQueueTest(TestCase):
+    def setUp(self):
+        self.item = QueuedEmail.objects.create(
+            subject="Тема", body="Текст", html_body="<b>Текст</b>", to="u@example.com"
+        )
+
+    def deliver(self):
+        batch = EMAIL_QUEUE.claim("worker")
+        with MailConnection() as connection:
+            return EMAIL_QUEUE.deliver("worker", batch, connection)
+
+    def test_sent_with_html_alternative(self):
+        self.assertEqual(self.deliver()[QueuedEmail.SENT], [self.item.pk])
+        self.assertEqual(mail.outbox[0].to, ["u@example.com"])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+
+    def test_transient_error_is_retried(self):
+        with ScriptedSink([b"451 Try again later\r\n"]) as sink, sink_settings(sink):
+            self.assertEqual(self.deliver()[QueuedEmail.PENDING], [self.item.pk])
+            self.item.refresh_from_db()
+            self.assertIn("451", self.item.last_error)
+            self.assertGreater(self.item.next_attempt_at, timezone.now())
+
+            QueuedEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(self.deliver()[QueuedEmail.SENT], [self.item.pk])
+        self.assertEqual(sink.received, 2)
@@ -0,0 +1,68 @@
+import csv
+import io
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from mailing.models import Client
+from mailing.services import iter_csv, make_attempt, save_attempts
+
+from .utils import create_mailing, create_owner
+
+
+def read_csv(response):
+    content = b"".join(response.streaming_content).decode("utf-8-sig")
+    return list(csv.reader(io.StringIO(content)))
+
+
+class IterCsvTest(SimpleTestCase):
+    def test_rows_are_yielded_in_chunks(self):
+        chunks = list(iter_csv(["a"], ([index] for index in range(5)), chunk_size=2))
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(chunks[0].startswith("\ufeff"))
+        self.assertEqual(chunks[-1], "4\r\n")
+
+
+class ExportViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=2)
+        cls.other_mailing = create_mailing(create_owner("other"), clients=1)
+        attempts = [
+            make_attempt(mailing, client, 1)
+            for mailing in (cls.mailing, cls.other_mailing)
+            for client in mailing.clients.all()
+        ]
+        save_attempts(attempts)
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def test_clients_export_is_owner_scoped(self):
+        response = self.client.get(reverse("mailing:client_export"))
+        self.assertTrue(response.streaming)
+        rows = read_csv(response)
+        self.assertEqual(rows[0][0], "email")
+        self.assertEqual(
+            sorted(row[0] for row in rows[1:]),
+            list(
+                Client.objects.filter(owner=self.owner)
+                .order_by("email")
+                .values_list("email", flat=True)
+            ),
+        )
+
+    def test_logs_export_uses_filter(self):
+        response = self.client.get(
+            reverse("mailing:logs_export"), {"mailing": self.mailing.pk}
+        )
+        rows = read_csv(response)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row[1] for row in rows[1:]}, {self.mailing.title})
+
+    def test_invalid_filter_is_rejected(self):
+        response = self.client.get(
+            reverse("mailing:logs_export"), {"mailing": self.other_mailing.pk}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,139 @@
+import csv
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from mailing.models import Client
+from mailing.services import import_clients
+
+from .utils import create_owner
+
+
+class ImportClientsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        Client.objects.create(
+            email="known@example.com", initials="Известный", owner=cls.owner
+        )
+
+    def import_rows(self, text, **kwargs):
+        output = io.StringIO()
+        report = import_clients(
+            self.owner, io.StringIO(text), rejected=csv.writer(output), **kwargs
+        )
+        return report, list(csv.reader(io.StringIO(output.getvalue())))
+
+    def test_dedupe_and_rejects(self):
+        report, rejected = self.import_rows(
+            "email,initials,comment\n"
+            "new@example.com,Новый,\n"
+            "NEW@example.com,Дубль,\n"
+            "Known@Example.com,Известный,\n"
+            "not-an-email,Ошибка,коммент\n"
+            ",Пустой,\n"
+            "other@example.com,,\n",
+            batch_size=2,
+        )
+
+        self.assertEqual(report, {"created": 2, "duplicate": 2, "invalid": 2})
+        self.assertEqual(
+            set(
+                Client.objects.filter(owner=self.owner).values_list("email", "initials")
+            ),
+            {
+                ("known@example.com", "Известный"),
+                ("new@example.com", "Новый"),
+                ("other@example.com", "other@example.com"),
+            },
+        )
+        self.assertEqual(rejected[0], ["email", "initials", "comment", "error"])
+        self.assertEqual(
+            [row[0] for row in rejected[1:]],
+            ["NEW@example.com", "Known@Example.com", "not-an-email", ""],
+        )
+        self.assertEqual(
+            rejected[3], ["not-an-email", "Ошибка", "коммент", "некорректный email"]
+        )
+
+    def test_other_owner_emails_are_not_duplicates(self):
+        other = create_owner("other")
+        report = import_clients(other, io.StringIO("email\nknown@example.com\n"))
+        self.assertEqual(report["created"], 1)
+
+    def test_email_column_required(self):
+        with self.assertRaises(ValueError):
+            import_clients(self.owner, io.StringIO("mail,initials\na@example.com,A\n"))
+        with self.assertRaises(ValueError):
+            import_clients(self.owner, io.StringIO(""))
+
+    def test_batches_before_error_are_kept(self):
+        def rows():
+            yield "email\n"
+            for index in range(3):
+                yield f"client{index}@example.com\n"
+            raise csv.Error("обрыв файла")
+
+        with self.assertRaises(csv.Error):
+            import_clients(self.owner, rows(), batch_size=2)
+        self.assertEqual(
+            sorted(
+                Client.objects.filter(email__startswith="client").values_list(
+                    "email", flat=True
+                )
+            ),
+            ["client0@example.com", "client1@example.com"],
+        )
+
+
+class ClientImportViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+
+    def setUp(self):
+        self.rejected_dir = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(
+            mock.patch(
+                "mailing.views.CLIENT_IMPORT_REJECTED_DIR", str(self.rejected_dir)
+            )
+        )
+        self.client.force_login(self.owner)
+
+    def upload(self, content):
+        return self.client.post(
+            reverse("mailing:client_import"),
+            {"file": SimpleUploadedFile("clients.csv", content)},
+        )
+
+    def test_rejected_rows_can_be_downloaded(self):
+        response = self.upload(b"email\nnew@example.com\nbad\n")
+        self.assertEqual(response.context["report"]["created"], 1)
+        name = response.context["rejected_name"]
+        download = self.client.get(
+            reverse("mailing:client_import_rejected", args=[name])
+        )
+        self.assertIn(b"bad", b"".join(download.streaming_content))
+
+    def test_old_rejected_files_are_removed(self):
+        old = self.rejected_dir / "1-old.csv"
+        fresh = self.rejected_dir / "1-fresh.csv"
+        old.write_text("email\n")
+        fresh.write_text("email\n")
+        day_ago = time.time() - 25 * 3600
+        os.utime(old, (day_ago, day_ago))
+
+        self.upload(b"email\nnew@example.com\n")
+        self.assertFalse(old.exists())
+        self.assertTrue(fresh.exists())
+
+    def test_decode_error_is_reported(self):
+        response = self.upload(b"email\nnew@example.com\n\xff\xfe\n")
+        self.assertIn("UTF-8", str(response.context["form"].errors["file"]))
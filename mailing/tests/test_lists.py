@@ -0,0 +1,54 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+
+from config.settings import LIST_PAGE_SIZE
+from mailing.models import Client, Mailing
+from users.services import MANAGERS_GROUP
+
+from .utils import create_mailing, create_owner
+
+
+class OwnedQuerySetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.other = create_owner("other")
+        cls.manager = create_owner("manager")
+        cls.manager.groups.add(Group.objects.create(name=MANAGERS_GROUP))
+        cls.mailing = create_mailing(cls.owner, clients=3)
+        cls.other_mailing = create_mailing(cls.other, clients=1)
+
+    def test_owner_sees_own_objects_newest_first(self):
+        self.assertEqual(
+            list(Client.objects.for_user(self.owner)),
+            list(Client.objects.filter(owner=self.owner).order_by("-pk")),
+        )
+        self.assertEqual(
+            list(Mailing.objects.for_user(self.other)), [self.other_mailing]
+        )
+
+    def test_manager_sees_all_owners(self):
+        self.assertEqual(
+            list(Mailing.objects.for_user(self.manager)),
+            [self.other_mailing, self.mailing],
+        )
+        self.assertEqual(list(Mailing.objects.owned_by(self.manager)), [])
+
+    def test_list_rows_need_no_extra_queries(self):
+        clients = list(Client.objects.for_list(self.manager))
+        with self.assertNumQueries(0):
+            for client in clients:
+                (client.initials, client.email, client.owner.username)
+
+    def test_list_page_is_paginated(self):
+        self.client.force_login(self.owner)
+        Client.objects.bulk_create(
+            Client(email=f"extra{index}@example.com", owner=self.owner)
+            for index in range(LIST_PAGE_SIZE)
+        )
+        response = self.client.get(reverse("mailing:clients_all"))
+        self.assertEqual(len(response.context["object_list"]), LIST_PAGE_SIZE)
+        self.assertTrue(response.context["page_obj"].has_next())
+        response = self.client.get(reverse("mailing:clients_all"), {"page": 2})
+        self.assertEqual(len(response.context["object_list"]), 3)
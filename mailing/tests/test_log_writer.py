@@ -0,0 +1,65 @@
+from datetime import date
+
+from django.test import TestCase, override_settings
+
+from mailing.models import AttemptToSend, MailingDailyStats
+from mailing.services import AttemptLogWriter, make_attempt
+
+from .utils import create_mailing, create_owner, utc
+
+
+class AttemptLogWriterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mailing = create_mailing(create_owner(), clients=5)
+        cls.clients = list(cls.mailing.clients.order_by("pk"))
+
+    def attempt(self, index, mail_response=1):
+        return make_attempt(self.mailing, self.clients[index], mail_response)
+
+    def test_flushes_full_batches_and_rest_on_exit(self):
+        with AttemptLogWriter(batch_size=3, flush_interval=3600) as log_writer:
+            for index in range(5):
+                log_writer.add(self.attempt(index))
+                self.assertEqual(AttemptToSend.objects.count(), 3 if index >= 2 else 0)
+        self.assertEqual(AttemptToSend.objects.count(), 5)
+
+    def test_flushes_after_interval(self):
+        with AttemptLogWriter(batch_size=100, flush_interval=0) as log_writer:
+            log_writer.add(self.attempt(0))
+            self.assertEqual(AttemptToSend.objects.count(), 1)
+
+    def test_flushes_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with AttemptLogWriter(batch_size=100, flush_interval=3600) as log_writer:
+                log_writer.add(self.attempt(0))
+                raise RuntimeError
+        self.assertEqual(AttemptToSend.objects.count(), 1)
+
+    def test_stats_count_statuses(self):
+        with AttemptLogWriter() as log_writer:
+            log_writer.add(self.attempt(0))
+            log_writer.add(self.attempt(1))
+            log_writer.add(self.attempt(2, ConnectionRefusedError("down")))
+        stats = MailingDailyStats.objects.get(mailing=self.mailing)
+        self.assertEqual((stats.sent, stats.failed), (2, 1))
+
+    @override_settings(TIME_ZONE="Europe/Moscow")
+    def test_keeps_send_time_across_midnight(self):
+        attempt = self.attempt(0)
+        # 23:59 по Москве; буфер сохраняется уже на следующий день
+        attempt.time_log_send = utc(2026, 1, 1, 20, 59)
+        with AttemptLogWriter() as log_writer:
+            log_writer.add(attempt)
+
+        self.assertEqual(
+            AttemptToSend.objects.get().time_log_send, attempt.time_log_send
+        )
+        self.assertEqual(
+            list(
+                MailingDailyStats.objects.filter(mailing=self.mailing).values_list(
+                    "day", "sent"
+                )
+            ),
+            [(date(2026, 1, 1), 1)],
+        )
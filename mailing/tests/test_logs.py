@@ -0,0 +1,106 @@
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from mailing.forms import LogsFilterForm
+from mailing.models import AttemptToSend
+from mailing.services import (decode_log_cursor, encode_log_cursor,
+                              make_attempt, save_attempts)
+
+from .utils import create_mailing, create_owner, utc
+
+
+class LogCursorTest(SimpleTestCase):
+    def test_round_trip(self):
+        log = AttemptToSend(pk=42, time_log_send=utc(2026, 3, 1, 12, 30, 0, 123456))
+        self.assertEqual(
+            decode_log_cursor(encode_log_cursor(log)), (log.time_log_send, 42)
+        )
+
+    def test_invalid_values(self):
+        for value in [None, "", "abc", "1", "1_2_3", "x_1", "1_x"]:
+            with self.subTest(value=value):
+                self.assertIsNone(decode_log_cursor(value))
+
+    def test_out_of_range_value(self):
+        self.assertIsNone(decode_log_cursor(f"{10 ** 30}_1"))
+        self.assertIsNone(decode_log_cursor(f"-{10 ** 30}_1"))
+
+
+class LogsViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=3)
+        cls.other_mailing = create_mailing(create_owner("other"), clients=1)
+        attempts = []
+        for mailing in (cls.mailing, cls.other_mailing):
+            for client in mailing.clients.all():
+                for _ in range(40):
+                    attempt = make_attempt(mailing, client, 1)
+                    # одинаковое время: порядок страниц держится на pk
+                    attempt.time_log_send = utc(2026, 3, 1, 12)
+                    attempts.append(attempt)
+        save_attempts(attempts)
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def test_pages_cover_own_logs_once(self):
+        seen = []
+        query = ""
+        while query is not None:
+            response = self.client.get(f"{reverse('mailing:logs')}?{query}")
+            seen += [log.pk for log in response.context["logs"]]
+            query = response.context.get("next_page_query")
+        own = AttemptToSend.objects.filter(mailing_list=self.mailing)
+        self.assertEqual(seen, list(own.order_by("-pk").values_list("pk", flat=True)))
+
+    def test_other_owner_mailing_filter_is_empty(self):
+        response = self.client.get(
+            reverse("mailing:logs"), {"mailing": self.other_mailing.pk}
+        )
+        self.assertEqual(response.context["logs"], [])
+
+    def test_filter_renders_only_selected_mailing(self):
+        for index in range(30):
+            create_mailing(self.owner, title=f"Лишняя {index}")
+        form = LogsFilterForm({"mailing": self.mailing.pk}, user=self.owner)
+        self.assertTrue(form.is_valid())
+        with self.assertNumQueries(1):
+            html = str(form["mailing"])
+        self.assertIn(f'value="{self.mailing.pk}" selected', html)
+        self.assertNotIn("Лишняя", html)
+
+    def test_mailing_search(self):
+        create_mailing(self.owner, title="Новости")
+        response = self.client.get(reverse("mailing:mailing_search"), {"q": "Нов"})
+        self.assertEqual(
+            [result["text"] for result in response.json()["results"]], ["Новости"]
+        )
+        response = self.client.get(reverse("mailing:mailing_search"))
+        self.assertNotIn(
+            self.other_mailing.pk,
+            [result["id"] for result in response.json()["results"]],
+        )
+
+
+class AttemptOrderingTest(TestCase):
+    def test_default_ordering_matches_log_indexes(self):
+        mailing = create_mailing(create_owner(), clients=1)
+        client = mailing.clients.get()
+        first, second, third = (make_attempt(mailing, client, 1) for _ in range(3))
+        first.time_log_send = utc(2026, 3, 1, 12)
+        second.time_log_send = third.time_log_send = utc(2026, 3, 1, 13)
+        save_attempts([first, second, third])
+        self.assertEqual(
+            list(AttemptToSend.objects.values_list("pk", flat=True)),
+            [third.pk, second.pk, first.pk],
+        )
+
+    def test_explain_logs_requires_postgresql(self):
+        if connection.vendor == "postgresql":
+            self.skipTest("PostgreSQL")
+        with self.assertRaises(CommandError):
+            call_command("explain_logs", "--compare")
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from mailing.models import AttemptToSend, OutboxMessage
+from mailing.services import (OUTBOX, AttemptLogWriter, LeasedQueue,
+                              MailConnection, deliver_outbox)
+
+from .utils import create_mailing, create_owner
+
+
+def expire(*pks):
+    OutboxMessage.objects.filter(pk__in=pks).update(
+        locked_until=timezone.now() - timedelta(seconds=1)
+    )
+
+
+class LeasedQueueTest(SimpleTestCase):
+    def test_build_message_is_required(self):
+        class Queue(LeasedQueue):
+            model = OutboxMessage
+
+        with self.assertRaises(TypeError):
+            Queue(1, 1, 1, 1, 1)
+
+
+class OutboxLeaseTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mailing = create_mailing(create_owner(), clients=3)
+
+    def setUp(self):
+        self.items = OutboxMessage.objects.bulk_create(
+            OutboxMessage(mailing=self.mailing, client=client)
+            for client in self.mailing.clients.order_by("pk")
+        )
+        self.item = self.items[0]
+
+    def deliver(self, worker, batch, on_result=None):
+        with MailConnection() as connection:
+            return OUTBOX.deliver(worker, batch, connection, on_result=on_result)
+
+    def test_claim_leases_item(self):
+        self.assertEqual(OUTBOX.claim("worker", limit=1), [self.item])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.state, OutboxMessage.SENDING)
+        self.assertEqual(self.item.locked_by, "worker")
+        self.assertEqual(self.item.attempts, 1)
+        self.assertEqual(OUTBOX.claim("other"), self.items[1:])
+
+    def test_expired_lease_is_reclaimed(self):
+        OUTBOX.claim("worker")
+        expire(self.item.pk)
+        self.assertEqual(OUTBOX.claim("other"), [self.item])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.locked_by, "other")
+        self.assertEqual(self.item.attempts, 2)
+
+    def test_sent(self):
+        batch = OUTBOX.claim("worker")
+        with MailConnection() as connection, AttemptLogWriter() as log_writer:
+            done = deliver_outbox("worker", batch, connection, log_writer)
+        self.assertEqual(done[OutboxMessage.SENT], [item.pk for item in self.items])
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.state, OutboxMessage.SENT)
+        self.assertIsNone(self.item.locked_until)
+        self.assertEqual(
+            AttemptToSend.objects.filter(status_log=AttemptToSend.SUCCESS).count(), 3
+        )
+
+    def test_expired_lease_mid_batch_is_not_sent_twice(self):
+        def on_result(item, mail_response):
+            # Пока первый обработчик отправлял письмо, аренда остальных
+            # строк истекла и их забрал второй обработчик
+            if item == self.item:
+                expire(*[item.pk for item in self.items[1:]])
+                reclaimed.extend(OUTBOX.claim("other"))
+
+        reclaimed = []
+        done = self.deliver("worker", OUTBOX.claim("worker"), on_result)
+        self.assertEqual(done[OutboxMessage.SENT], [self.item.pk])
+        self.assertEqual(
+            done[OutboxMessage.SENDING], [item.pk for item in self.items[1:]]
+        )
+        self.assertEqual(reclaimed, self.items[1:])
+
+        done = self.deliver("other", reclaimed)
+        self.assertEqual(done[OutboxMessage.SENT], [item.pk for item in self.items[1:]])
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(self.mailing.clients.values_list("email", flat=True)),
+        )
+        self.assertFalse(
+            OutboxMessage.objects.exclude(state=OutboxMessage.SENT).exists()
+        )
+
+    def test_sent_item_survives_worker_crash(self):
+        def on_result(item, mail_response):
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            self.deliver("worker", OUTBOX.claim("worker"), on_result)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.state, OutboxMessage.SENT)
+
+        expire(*[item.pk for item in self.items])
+        self.assertEqual(OUTBOX.claim("other"), self.items[1:])
@@ -0,0 +1,164 @@
+import smtplib
+from functools import partial
+
+import aiosmtplib
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from mailing.async_delivery import (AsyncMailConnection, asend_mailing,
+                                    is_transient_async_error)
+from mailing.models import AttemptToSend, OutboxMessage
+from mailing.services import (OUTBOX, AttemptLogWriter, MailConnection,
+                              deliver_outbox, get_recipients,
+                              is_transient_error, iter_recipients, retry_delay,
+                              send_mailing)
+
+from .utils import ScriptedSink, create_mailing, create_owner, sink_settings
+
+
+class TransientErrorTest(SimpleTestCase):
+    def test_4xx_response_is_transient(self):
+        self.assertTrue(is_transient_error(smtplib.SMTPDataError(451, b"later")))
+
+    def test_5xx_response_is_permanent(self):
+        self.assertFalse(is_transient_error(smtplib.SMTPDataError(550, b"no user")))
+
+    def test_refused_recipients(self):
+        self.assertTrue(
+            is_transient_error(
+                smtplib.SMTPRecipientsRefused({"a@example.com": (450, b"busy")})
+            )
+        )
+        self.assertFalse(
+            is_transient_error(
+                smtplib.SMTPRecipientsRefused(
+                    {"a@example.com": (450, b"busy"), "b@example.com": (550, b"no")}
+                )
+            )
+        )
+
+    def test_network_errors_are_transient(self):
+        self.assertTrue(is_transient_error(smtplib.SMTPServerDisconnected()))
+        self.assertTrue(is_transient_error(ConnectionRefusedError()))
+        self.assertTrue(is_transient_error(TimeoutError()))
+
+    def test_other_errors_are_permanent(self):
+        self.assertFalse(is_transient_error(smtplib.SMTPException("bad")))
+        self.assertFalse(is_transient_error(ValueError("bad")))
+
+
+class TransientAsyncErrorTest(SimpleTestCase):
+    def test_response_codes(self):
+        self.assertTrue(
+            is_transient_async_error(aiosmtplib.SMTPDataError(451, "later"))
+        )
+        self.assertFalse(
+            is_transient_async_error(aiosmtplib.SMTPDataError(550, "no user"))
+        )
+
+    def test_network_errors_are_transient(self):
+        self.assertTrue(
+            is_transient_async_error(aiosmtplib.SMTPServerDisconnected("closed"))
+        )
+        self.assertTrue(
+            is_transient_async_error(aiosmtplib.SMTPTimeoutError("timeout"))
+        )
+        self.assertFalse(is_transient_async_error(aiosmtplib.SMTPException("bad")))
+
+
+class RetryDelayTest(SimpleTestCase):
+    def test_grows_exponentially_with_jitter(self):
+        for attempts, delay in [(1, 60), (2, 120), (3, 240)]:
+            seconds = retry_delay(attempts, 60, 3600).total_seconds()
+            self.assertGreaterEqual(seconds, delay / 2)
+            self.assertLessEqual(seconds, delay)
+
+    def test_capped_by_max_delay(self):
+        self.assertLessEqual(retry_delay(30, 60, 3600).total_seconds(), 3600)
+
+
+class OutboxRetryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mailing = create_mailing(create_owner(), clients=1)
+
+    def setUp(self):
+        self.item = OutboxMessage.objects.create(
+            mailing=self.mailing, client=self.mailing.clients.get()
+        )
+
+    def deliver(self, response):
+        """Забирает письмо из очереди и отправляет его серверу с ответом response"""
+        batch = OUTBOX.claim("worker")
+        with ScriptedSink([response]) as sink, sink_settings(sink):
+            with MailConnection() as connection, AttemptLogWriter() as log_writer:
+                done = deliver_outbox("worker", batch, connection, log_writer)
+        self.item.refresh_from_db()
+        return done
+
+    def test_transient_error_is_retried(self):
+        done = self.deliver(b"451 Try again later\r\n")
+        self.assertEqual(done[OutboxMessage.PENDING], [self.item.pk])
+        self.assertEqual(self.item.state, OutboxMessage.PENDING)
+        self.assertGreater(self.item.next_attempt_at, timezone.now())
+        self.assertIn("451", self.item.last_error)
+        self.assertEqual(AttemptToSend.objects.get().status_log, AttemptToSend.FAILED)
+        self.assertEqual(OUTBOX.claim("worker"), [])
+
+    def test_permanent_error_fails(self):
+        done = self.deliver(b"550 No such user\r\n")
+        self.assertEqual(done[OutboxMessage.FAILED], [self.item.pk])
+        self.assertEqual(self.item.state, OutboxMessage.FAILED)
+        self.assertIn("550", self.item.last_error)
+
+    def test_transient_error_fails_after_max_attempts(self):
+        OutboxMessage.objects.filter(pk=self.item.pk).update(
+            attempts=OUTBOX.max_attempts - 1
+        )
+        self.deliver(b"451 Try again later\r\n")
+        self.assertEqual(self.item.state, OutboxMessage.FAILED)
+        self.assertEqual(self.item.attempts, OUTBOX.max_attempts)
+
+
+class DirectSendRetryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mailing = create_mailing(create_owner(), clients=3)
+        cls.clients = list(cls.mailing.clients.order_by("pk"))
+
+    def assert_requeued_first_client(self):
+        item = OutboxMessage.objects.get()
+        self.assertEqual(item.client, self.clients[0])
+        self.assertEqual(item.state, OutboxMessage.PENDING)
+        self.assertEqual(item.attempts, 1)
+        self.assertGreater(item.next_attempt_at, timezone.now())
+        self.assertIn("451", item.last_error)
+        self.assertEqual(
+            AttemptToSend.objects.filter(status_log=AttemptToSend.FAILED).count(), 2
+        )
+
+    def test_transient_error_is_requeued(self):
+        responses = [b"451 Try again later\r\n", b"550 No such user\r\n"]
+        with ScriptedSink(responses) as sink, sink_settings(sink):
+            send_mailing(self.mailing, iter_recipients(self.mailing))
+        self.assert_requeued_first_client()
+
+    def test_async_transient_error_is_requeued(self):
+        responses = [b"451 Try again later\r\n", b"550 No such user\r\n"]
+        with ScriptedSink(responses) as sink:
+            async_to_sync(asend_mailing)(
+                self.mailing,
+                get_recipients(self.mailing).aiterator(),
+                connection_factory=partial(
+                    AsyncMailConnection,
+                    sink.host,
+                    sink.port,
+                    username="",
+                    password="",
+                    use_tls=False,
+                    start_tls=False,
+                ),
+                concurrency=1,
+            )
+        self.assert_requeued_first_client()
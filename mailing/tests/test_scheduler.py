@@ -0,0 +1,203 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from mailing.models import Mailing, OutboxMessage
+from mailing.services import claim_run, get_due_mailings, get_next_run
+
+from .utils import create_mailing, create_owner, utc
+
+
+class NextRunTest(SimpleTestCase):
+    def test_daily_keeps_time_of_day(self):
+        mailing = Mailing(
+            period_mail=Mailing.DAILY,
+            started_at=utc(2026, 1, 1, 10),
+            next_run_at=utc(2026, 1, 5, 10),
+        )
+        self.assertEqual(
+            get_next_run(mailing, utc(2026, 1, 5, 10, 0, 3)), utc(2026, 1, 6, 10)
+        )
+
+    def test_missed_runs_are_skipped(self):
+        mailing = Mailing(
+            period_mail=Mailing.WEEKLY,
+            started_at=utc(2026, 1, 1, 10),
+            next_run_at=utc(2026, 1, 1, 10),
+        )
+        self.assertEqual(
+            get_next_run(mailing, utc(2026, 1, 20, 10)), utc(2026, 1, 22, 10)
+        )
+
+    def test_monthly_stays_on_start_day(self):
+        mailing = Mailing(
+            period_mail=Mailing.MONTHLY,
+            started_at=utc(2026, 1, 31, 10),
+            next_run_at=utc(2026, 1, 31, 10),
+        )
+        runs = []
+        for _ in range(3):
+            mailing.next_run_at = get_next_run(mailing, mailing.next_run_at)
+            runs.append(mailing.next_run_at)
+        self.assertEqual(
+            runs, [utc(2026, 2, 28, 10), utc(2026, 3, 31, 10), utc(2026, 4, 30, 10)]
+        )
+
+    @override_settings(TIME_ZONE="Europe/Moscow")
+    def test_monthly_anchor_is_local_day(self):
+        # 31 января 01:00 по Москве - это еще 30 января по UTC
+        mailing = Mailing(
+            period_mail=Mailing.MONTHLY,
+            started_at=utc(2026, 1, 30, 22),
+            next_run_at=utc(2026, 1, 30, 22),
+        )
+        runs = []
+        for _ in range(2):
+            mailing.next_run_at = get_next_run(mailing, mailing.next_run_at)
+            runs.append(mailing.next_run_at)
+        self.assertEqual(runs, [utc(2026, 2, 27, 22), utc(2026, 3, 30, 22)])
+
+    def test_monthly_crosses_year(self):
+        mailing = Mailing(
+            period_mail=Mailing.MONTHLY,
+            started_at=utc(2025, 12, 15, 10),
+            next_run_at=utc(2025, 12, 15, 10),
+        )
+        self.assertEqual(
+            get_next_run(mailing, utc(2025, 12, 15, 10)), utc(2026, 1, 15, 10)
+        )
+
+    def test_counts_from_start_without_next_run(self):
+        mailing = Mailing(period_mail=Mailing.DAILY, started_at=utc(2026, 1, 1, 10))
+        self.assertEqual(
+            get_next_run(mailing, utc(2026, 1, 3, 12)), utc(2026, 1, 4, 10)
+        )
+
+    def test_none_after_finish(self):
+        mailing = Mailing(
+            period_mail=Mailing.DAILY,
+            started_at=utc(2026, 1, 1, 10),
+            finished_at=utc(2026, 1, 5, 12),
+            next_run_at=utc(2026, 1, 5, 10),
+        )
+        self.assertIsNone(get_next_run(mailing, utc(2026, 1, 5, 10)))
+
+    def test_none_for_single(self):
+        mailing = Mailing(
+            period_mail=Mailing.SINGLE,
+            started_at=utc(2026, 1, 1, 10),
+            next_run_at=utc(2026, 1, 1, 10),
+        )
+        self.assertIsNone(get_next_run(mailing, utc(2026, 1, 1, 10)))
+
+
+class ClaimRunTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mailing = create_mailing(create_owner(), period_mail=Mailing.DAILY)
+
+    def test_only_one_scheduler_claims_run(self):
+        now = timezone.now()
+        Mailing.objects.filter(pk=self.mailing.pk).update(
+            next_run_at=now - timedelta(minutes=1)
+        )
+        first = Mailing.objects.get(pk=self.mailing.pk)
+        second = Mailing.objects.get(pk=self.mailing.pk)
+
+        self.assertTrue(claim_run(first, now))
+        self.assertFalse(claim_run(second, now))
+        self.mailing.refresh_from_db()
+        self.assertEqual(self.mailing.next_run_at, first.next_run_at)
+        self.assertGreater(self.mailing.next_run_at, now)
+
+
+class ScheduleViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=1)
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def post_mailing(self, url, period_mail):
+        return self.client.post(
+            url,
+            {
+                "title": "Рассылка",
+                "period_mail": period_mail,
+                "message": self.mailing.message_id,
+                "clients": list(self.mailing.clients.values_list("pk", flat=True)),
+            },
+        )
+
+    def toggle(self, mailing):
+        self.client.post(reverse("mailing:disable_mailing", args=[mailing.pk]))
+        mailing.refresh_from_db()
+
+    def test_created_periodic_mailing_is_scheduled(self):
+        self.post_mailing(reverse("mailing:mailing_add"), Mailing.WEEKLY)
+        mailing = Mailing.objects.latest("pk")
+        self.assertEqual(mailing.next_run_at, mailing.started_at + timedelta(weeks=1))
+
+    def test_created_single_mailing_waits_for_send_button(self):
+        self.post_mailing(reverse("mailing:mailing_add"), Mailing.SINGLE)
+        self.assertIsNone(Mailing.objects.latest("pk").next_run_at)
+
+    def test_changed_period_reschedules(self):
+        url = reverse("mailing:mailing_update", args=[self.mailing.pk])
+        self.post_mailing(url, Mailing.DAILY)
+        self.mailing.refresh_from_db()
+        self.assertEqual(
+            self.mailing.next_run_at, self.mailing.started_at + timedelta(days=1)
+        )
+
+    def test_reenabled_sent_single_mailing_is_not_resent(self):
+        self.toggle(self.mailing)
+        self.assertEqual(self.mailing.status_mail, "COMPLETED")
+        self.toggle(self.mailing)
+        self.assertEqual(self.mailing.status_mail, "STARTED")
+        self.assertIsNone(self.mailing.next_run_at)
+
+    def test_disabled_mailing_keeps_its_run(self):
+        now = timezone.now()
+        Mailing.objects.filter(pk=self.mailing.pk).update(
+            period_mail=Mailing.DAILY, next_run_at=now - timedelta(minutes=1)
+        )
+        self.mailing.refresh_from_db()
+        self.toggle(self.mailing)
+        self.assertNotIn(self.mailing, get_due_mailings(now))
+
+        self.toggle(self.mailing)
+        self.assertGreater(self.mailing.next_run_at, now)
+        self.assertEqual(
+            timezone.localtime(self.mailing.next_run_at).time(),
+            timezone.localtime(self.mailing.started_at).time(),
+        )
+
+
+class SendButtonTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=3)
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def test_request_only_makes_mailing_due(self):
+        with self.assertNumQueries(6):
+            self.client.post(
+                reverse("mailing:mailing_sendmail", args=[self.mailing.pk])
+            )
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertIn(self.mailing, get_due_mailings(timezone.now()))
+
+    def test_second_press_does_not_postpone_run(self):
+        due = timezone.now() - timedelta(minutes=5)
+        Mailing.objects.filter(pk=self.mailing.pk).update(next_run_at=due)
+        self.client.post(reverse("mailing:mailing_sendmail", args=[self.mailing.pk]))
+        self.mailing.refresh_from_db()
+        self.assertEqual(self.mailing.next_run_at, due)
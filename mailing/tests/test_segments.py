@@ -0,0 +1,82 @@
+from datetime import date
+
+from django.test import TestCase, override_settings
+
+from mailing.models import Client, Segment
+from mailing.services import get_recipients
+
+from .utils import create_mailing, create_owner, utc
+
+
+@override_settings(TIME_ZONE="UTC")
+class SegmentTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=2)
+        for email, comment, day in [
+            ("a@corp.example", "постоянный", 1),
+            ("b@CORP.example", None, 10),
+            ("c@home.example", "постоянный", 10),
+        ]:
+            client = Client.objects.create(
+                email=email, comment=comment, owner=cls.owner
+            )
+            Client.objects.filter(pk=client.pk).update(created_at=utc(2026, 3, day, 23))
+        Client.objects.create(email="d@corp.example", owner=create_owner("other"))
+
+    def segment_emails(self, **rules):
+        segment = Segment.objects.create(title="Сегмент", owner=self.owner, **rules)
+        return set(
+            Client.objects.filter(segment.get_filter()).values_list("email", flat=True)
+        )
+
+    def test_rules(self):
+        self.assertEqual(
+            self.segment_emails(email_domain="@corp.example"),
+            {"a@corp.example", "b@CORP.example"},
+        )
+        self.assertEqual(
+            self.segment_emails(comment_contains="постоян"),
+            {"a@corp.example", "c@home.example"},
+        )
+        self.assertEqual(
+            self.segment_emails(
+                created_from=date(2026, 3, 2), created_to=date(2026, 3, 10)
+            ),
+            {"b@CORP.example", "c@home.example"},
+        )
+        self.assertEqual(len(self.segment_emails()), 5)
+
+    def test_recipients_union_without_duplicates(self):
+        self.mailing.clients.add(Client.objects.get(email="a@corp.example"))
+        self.mailing.segment = Segment.objects.create(
+            title="Корпоративные", email_domain="corp.example", owner=self.owner
+        )
+        self.mailing.save()
+        self.assertEqual(
+            [client.email for client in get_recipients(self.mailing)],
+            [
+                "client0@example.com",
+                "client1@example.com",
+                "a@corp.example",
+                "b@CORP.example",
+            ],
+        )
+
+    def test_segment_without_owner_selects_nobody(self):
+        Client.objects.filter(owner=self.owner).update(owner=None)
+        segment = Segment.objects.create(title="Ничей")
+        self.assertFalse(Client.objects.filter(segment.get_filter()).exists())
+
+    def test_owner_with_used_segment_can_be_deleted(self):
+        self.mailing.segment = Segment.objects.create(title="Все", owner=self.owner)
+        self.mailing.save()
+        self.owner.delete()
+        self.assertIsNone(Segment.objects.get().owner)
+        self.mailing.refresh_from_db()
+        # остаются только выбранные вручную клиенты
+        self.assertEqual(
+            [client.email for client in get_recipients(self.mailing)],
+            ["client0@example.com", "client1@example.com"],
+        )
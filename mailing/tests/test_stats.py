@@ -0,0 +1,60 @@
+from datetime import date
+from smtplib import SMTPDataError
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from mailing.models import MailingDailyStats
+from mailing.services import get_mailing_stats, make_attempt, save_attempts
+
+from .utils import create_mailing, create_owner, utc
+
+
+@override_settings(TIME_ZONE="UTC")
+class DailyStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner()
+        cls.mailing = create_mailing(cls.owner, clients=2)
+        cls.client_ = cls.mailing.clients.first()
+
+    def save(self, day, sent=0, failed=0):
+        attempts = [make_attempt(self.mailing, self.client_, 1) for _ in range(sent)]
+        attempts += [
+            make_attempt(self.mailing, self.client_, SMTPDataError(550, b"no"))
+            for _ in range(failed)
+        ]
+        for attempt in attempts:
+            attempt.time_log_send = utc(2026, 3, day, 12)
+        save_attempts(attempts)
+
+    def test_batches_are_added_to_the_same_day(self):
+        self.save(1, sent=2, failed=1)
+        self.save(1, sent=3)
+        self.save(2, failed=4)
+        self.assertEqual(
+            list(
+                MailingDailyStats.objects.order_by("day").values_list(
+                    "day", "sent", "failed"
+                )
+            ),
+            [(date(2026, 3, 1), 5, 1), (date(2026, 3, 2), 0, 4)],
+        )
+
+    def test_stats_totals_and_days(self):
+        self.save(1, sent=2, failed=1)
+        self.save(2, sent=1)
+        stats = get_mailing_stats(self.mailing.pk)
+        self.assertEqual((stats["sent"], stats["failed"]), (3, 1))
+        self.assertEqual(
+            [row["day"] for row in stats["days"]], [date(2026, 3, 2), date(2026, 3, 1)]
+        )
+
+    def test_stats_view_is_owner_only(self):
+        self.save(1, sent=1)
+        self.client.force_login(self.owner)
+        url = reverse("mailing:mailing_stats", args=[self.mailing.pk])
+        self.assertEqual(self.client.get(url).json()["sent"], 1)
+
+        self.client.force_login(create_owner("other"))
+        self.assertEqual(self.client.get(url).status_code, 403)
@@ -0,0 +1,62 @@
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.test import override_settings
+
+from mailing.models import Client, Mailing, Message
+from mailing.smtp_sink import SMTPSink
+from users.models import User
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+def create_owner(username="owner"):
+    return User.objects.create(username=username, email=f"{username}@example.com")
+
+
+def create_mailing(owner, clients=0, **kwargs):
+    """Рассылка владельца с сообщением и clients выбранными клиентами"""
+    message = Message.objects.create(theme="Тема", body="Текст", owner=owner)
+    kwargs.setdefault("title", "Рассылка")
+    mailing = Mailing.objects.create(message=message, owner=owner, **kwargs)
+    mailing.clients.set(
+        Client.objects.bulk_create(
+            Client(
+                email=f"client{index}@example.com",
+                initials=f"Клиент {index}",
+                owner=owner,
+            )
+            for index in range(clients)
+        )
+    )
+    return mailing
+
+
+class ScriptedSink(SMTPSink):
+    """SMTP-сервер, отвечающий на каждое письмо следующим ответом из списка;
+    когда список кончился, письма принимаются"""
+
+    def __init__(self, responses=()):
+        super().__init__()
+        self.responses = list(responses)
+
+    async def accept_message(self):
+        self.received += 1
+        if self.responses:
+            return self.responses.pop(0)
+        return b"250 OK: queued\r\n"
+
+
+def sink_settings(sink):
+    """Настройки почты, направляющие отправку в локальный SMTP-сервер sink"""
+    return override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_HOST=sink.host,
+        EMAIL_PORT=sink.port,
+        EMAIL_HOST_USER="",
+        EMAIL_HOST_PASSWORD="",
+        EMAIL_USE_TLS=False,
+        EMAIL_USE_SSL=False,
+    )
@@ -2,12 +2,21 @@ from django.urls import path
 
 from mailing.apps import MailingConfig
 
+from .async_views import (AsyncClientDetailView, AsyncClientListView,
+                          AsyncHomeView, AsyncMailingDetailView,
+                          AsyncMailingListView, AsyncMessageDetailView,
+                          AsyncMessageListView, AsyncSegmentListView)
 from .views import (ClientCreateView, ClientDeleteView, ClientDetailView,
-                    ClientListView, ClientUpdateView, DisableMailingView,
-                    HomeView, LogsView, MailingCreateView, MailingDeleteView,
-                    MailingDetailView, MailingListView, MailingSendMail,
-                    MailingUpdateView, MessageCreateView, MessageDeleteView,
-                    MessageDetailView, MessageListView, MessageUpdateView)
+                    ClientExportView, ClientImportRejectedView,
+                    ClientImportView, ClientListView, ClientSearchView,
+                    ClientUpdateView, DisableMailingView, HomeView,
+                    LogsExportView, LogsView, MailingCreateView,
+                    MailingDeleteView, MailingDetailView, MailingListView,
+                    MailingProgressView, MailingSearchView, MailingSendMail,
+                    MailingSendMailAsync, MailingStatsView, MailingUpdateView,
+                    MessageCreateView, MessageDeleteView, MessageDetailView,
+                    MessageListView, MessageUpdateView, SegmentCreateView,
+                    SegmentDeleteView, SegmentListView, SegmentUpdateView)
 
 app_name = MailingConfig.name
 
@@ -23,22 +32,86 @@ urlpatterns = [
     path("clients_all/", ClientListView.as_view(), name="clients_all"),
     path("client/<int:pk>/", ClientDetailView.as_view(), name="client_details"),
     path("client_add/", ClientCreateView.as_view(), name="client_add"),
+    path("client_search/", ClientSearchView.as_view(), name="client_search"),
+    path("client_export/", ClientExportView.as_view(), name="client_export"),
+    path("client_import/", ClientImportView.as_view(), name="client_import"),
+    path(
+        "client_import/rejected/<slug:name>/",
+        ClientImportRejectedView.as_view(),
+        name="client_import_rejected",
+    ),
     path("client/<int:pk>/edit/", ClientUpdateView.as_view(), name="client_update"),
     path("client/<int:pk>/delete/", ClientDeleteView.as_view(), name="client_delete"),
+    path("segments_all/", SegmentListView.as_view(), name="segments_all"),
+    path("segment_add/", SegmentCreateView.as_view(), name="segment_add"),
+    path("segment/<int:pk>/edit/", SegmentUpdateView.as_view(), name="segment_update"),
+    path(
+        "segment/<int:pk>/delete/", SegmentDeleteView.as_view(), name="segment_delete"
+    ),
     path("mailings_all/", MailingListView.as_view(), name="mailings_all"),
     path("mailing/<int:pk>/", MailingDetailView.as_view(), name="mailing_details"),
     path("mailing_add/", MailingCreateView.as_view(), name="mailing_add"),
+    path("mailing_search/", MailingSearchView.as_view(), name="mailing_search"),
     path("mailing/<int:pk>/edit/", MailingUpdateView.as_view(), name="mailing_update"),
     path(
         "mailing/<int:pk>/delete/", MailingDeleteView.as_view(), name="mailing_delete"
     ),
     path("logs", LogsView.as_view(), name="logs"),
+    path("logs/export", LogsExportView.as_view(), name="logs_export"),
     path(
         "mailing/<int:pk>/sendmail", MailingSendMail.as_view(), name="mailing_sendmail"
     ),
+    path(
+        "mailing/<int:pk>/sendmail_async",
+        MailingSendMailAsync.as_view(),
+        name="mailing_sendmail_async",
+    ),
+    path(
+        "mailing/<int:pk>/progress",
+        MailingProgressView.as_view(),
+        name="mailing_progress",
+    ),
+    path(
+        "mailing/<int:pk>/stats",
+        MailingStatsView.as_view(),
+        name="mailing_stats",
+    ),
     path(
         "mailing/<int:pk>/disable_mailing",
         DisableMailingView.as_view(),
         name="disable_mailing",
     ),
+    # Асинхронные варианты страниц для чтения (выигрыш - под ASGI)
+    path("async/", AsyncHomeView.as_view(), name="home_async"),
+    path(
+        "async/messages_all/",
+        AsyncMessageListView.as_view(),
+        name="messages_all_async",
+    ),
+    path(
+        "async/message/<int:pk>/",
+        AsyncMessageDetailView.as_view(),
+        name="message_details_async",
+    ),
+    path("async/clients_all/", AsyncClientListView.as_view(), name="clients_all_async"),
+    path(
+        "async/client/<int:pk>/",
+        AsyncClientDetailView.as_view(),
+        name="client_details_async",
+    ),
+    path(
+        "async/segments_all/",
+        AsyncSegmentListView.as_view(),
+        name="segments_all_async",
+    ),
+    path(
+        "async/mailings_all/",
+        AsyncMailingListView.as_view(),
+        name="mailings_all_async",
+    ),
+    path(
+        "async/mailing/<int:pk>/",
+        AsyncMailingDetailView.as_view(),
+        name="mailing_details_async",
+    ),
 ]
@@ -1,18 +1,82 @@
+import csv
+import io
+from datetime import timedelta
+from pathlib import Path
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
 from django.core.exceptions import PermissionDenied
+from django.db.models import ProtectedError
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
-from django.utils.decorators import method_decorator
+from django.utils import timezone
 from django.views import View
-from django.views.decorators.cache import cache_page
 from django.views.generic import DetailView, ListView, TemplateView
-from django.views.generic.edit import CreateView, DeleteView, UpdateView
-
-from mailing.services import send_email, update_status, get_list_by_owner
+from django.views.generic.edit import (CreateView, DeleteView, FormView,
+                                       UpdateView)
+
+from config.settings import (CLIENT_IMPORT_REJECTED_DIR,
+                             CLIENT_IMPORT_REJECTED_RETENTION_HOURS,
+                             DETAIL_CACHE_TIMEOUT, LIST_PAGE_SIZE)
+from mailing.services import (cleanup_rejected_imports, decode_log_cursor,
+                              detail_cache_key, encode_log_cursor,
+                              export_clients, export_logs,
+                              get_dashboard_counters, get_mailing_stats,
+                              get_outbox_progress, import_clients, iter_csv,
+                              request_run, schedule_mailing, search_clients,
+                              search_mailings, seek_logs, update_status)
+from users.services import aget_user_roles, get_user_roles, is_manager
+
+from .forms import (ClientForm, ClientImportForm, LogsFilterForm, MailingForm,
+                    MessageForm, SegmentForm)
+from .models import AttemptToSend, Client, Mailing, Message, Segment
+
+
+class VersionedCacheMixin:
+    """Кеширует страницу объекта для конкретного пользователя до изменения объекта.
+
+    Версию объекта меняют сигналы (mailing.signals), поэтому правки видны
+    сразу, а чужая страница из кеша не отдается.
+    """
+
+    def get_cache_key(self, request, pk):
+        """Ключ страницы; None, если у запроса еще нет CSRF-cookie"""
+        csrf_secret = request.META.get("CSRF_COOKIE")
+        if not csrf_secret:
+            return None
+        user = request.user
+        access = get_user_roles(user) | user.get_all_permissions()
+        if user.is_superuser:
+            access |= {"superuser"}
+        return detail_cache_key(self.model, pk, user.pk, access, csrf_secret)
+
+    def get(self, request, *args, **kwargs):
+        key = self.get_cache_key(request, kwargs["pk"])
+        if key is None:
+            return super().get(request, *args, **kwargs)
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        response.render()
+        cache.set(key, response.content, DETAIL_CACHE_TIMEOUT)
+        return response
+
+
+class OwnedListView(LoginRequiredMixin, ListView):
+    """Постраничный список объектов, доступных пользователю по его роли"""
+
+    paginate_by = LIST_PAGE_SIZE
 
-from .forms import ClientForm, MailingForm, MessageForm
-from .models import AttemptToSend, Client, Mailing, Message
+    def get_queryset(self, *args, **kwargs):
+        return self.model.objects.for_list(self.request.user)
 
 
 class HomeView(TemplateView):
@@ -21,46 +85,28 @@ class HomeView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
-        if user.groups.filter(name="managers") or user.is_superuser:
-            messages_count = Message.objects.all().count()
-            mailings_count = Mailing.objects.all().count()
-            active_mailings_count = Mailing.objects.filter(
-                status_mail="STARTED"
-            ).count()
-            clients_count = Client.objects.all().count()
+        if not user.is_authenticated:
+            return context
+        if is_manager(user):
+            context.update(get_dashboard_counters())
         else:
-            messages_count = Message.objects.filter(owner=user.id).count()
-            mailings_count = Mailing.objects.filter(owner=user.id).count()
-            active_mailings_count = Mailing.objects.filter(
-                status_mail="STARTED", owner=user.id
-            ).count()
-            clients_count = Client.objects.filter(owner=user.id).count()
-        context["messages_count"] = messages_count
-        context["mailings_count"] = mailings_count
-        context["active_mailings_count"] = active_mailings_count
-        context["clients_count"] = clients_count
+            context.update(get_dashboard_counters(user.id))
         return context
 
 
-class MessageListView(LoginRequiredMixin, ListView):
+class MessageListView(OwnedListView):
     model = Message
     template_name = "mailing/messages_all.html"
     context_object_name = "messages"
 
-    def get_queryset(self, *args, **kwargs):
-        if self.request.user.groups.filter(name='managers') or self.request.user.is_superuser:
-            return Message.objects.order_by("-pk")
-        return get_list_by_owner(self.request.user.id, Message).order_by("-pk")
-
 
-@method_decorator(cache_page(60 * 15), name="dispatch")
-class MessageDetailView(LoginRequiredMixin, DetailView):
+class MessageDetailView(LoginRequiredMixin, VersionedCacheMixin, DetailView):
     model = Message
     template_name = "mailing/message_details.html"
     context_object_name = "message"
 
     def get_queryset(self):
-        return get_list_by_owner(self.request.user.id, Message).order_by("-pk")
+        return Message.objects.owned_by(self.request.user)
 
 
 class MessageCreateView(LoginRequiredMixin, CreateView):
@@ -99,25 +145,19 @@ class MessageDeleteView(LoginRequiredMixin, DeleteView):
         message.delete()
 
 
-class ClientListView(LoginRequiredMixin, ListView):
+class ClientListView(OwnedListView):
     model = Client
     template_name = "mailing/clients_all.html"
     context_object_name = "clients"
 
-    def get_queryset(self, *args, **kwargs):
-        if self.request.user.groups.filter(name='managers') or self.request.user.is_superuser:
-            return Client.objects.order_by("-pk")
-        return get_list_by_owner(self.request.user.id, Client).order_by("-pk")
 
-
-@method_decorator(cache_page(60 * 15), name="dispatch")
-class ClientDetailView(LoginRequiredMixin, DetailView):
+class ClientDetailView(LoginRequiredMixin, VersionedCacheMixin, DetailView):
     model = Client
     template_name = "mailing/client_details.html"
     context_object_name = "client"
 
     def get_queryset(self):
-        return get_list_by_owner(self.request.user.id, Client).order_by("-pk")
+        return Client.objects.owned_by(self.request.user)
 
 
 class ClientCreateView(LoginRequiredMixin, CreateView):
@@ -158,25 +198,182 @@ class ClientDeleteView(LoginRequiredMixin, DeleteView):
         client.delete()
 
 
-class MailingListView(LoginRequiredMixin, ListView):
+class ClientSearchView(LoginRequiredMixin, View):
+    """Поиск своих клиентов для выбора в рассылку: JSON-страница результатов"""
+
+    def get(self, request):
+        query = request.GET.get("q", "").strip()[:50]
+        try:
+            page = max(1, int(request.GET.get("page", 1)))
+        except ValueError:
+            page = 1
+        return JsonResponse(search_clients(request.user, query, page))
+
+
+class MailingSearchView(LoginRequiredMixin, View):
+    """Поиск доступных рассылок для фильтра журнала: JSON-страница результатов"""
+
+    def get(self, request):
+        query = request.GET.get("q", "").strip()[:50]
+        try:
+            page = max(1, int(request.GET.get("page", 1)))
+        except ValueError:
+            page = 1
+        mailings = Mailing.objects.for_user(request.user)
+        return JsonResponse(search_mailings(mailings, query, page))
+
+
+class ClientExportView(LoginRequiredMixin, View):
+    """Потоковая выгрузка клиентов в CSV"""
+
+    def get(self, request):
+        queryset = Client.objects.for_user(request.user)
+        response = StreamingHttpResponse(
+            iter_csv(
+                ["email", "initials", "comment", "owner", "created_at"],
+                export_clients(queryset),
+            ),
+            content_type="text/csv; charset=utf-8",
+        )
+        response["Content-Disposition"] = 'attachment; filename="clients.csv"'
+        return response
+
+
+class ClientImportView(LoginRequiredMixin, FormView):
+    """Загрузка клиентов из CSV; отклоненные строки можно скачать отдельным файлом"""
+
+    form_class = ClientImportForm
+    template_name = "mailing/client_import.html"
+
+    def form_valid(self, form):
+        rejected_dir = Path(CLIENT_IMPORT_REJECTED_DIR)
+        rejected_dir.mkdir(parents=True, exist_ok=True)
+        cleanup_rejected_imports(
+            rejected_dir, timedelta(hours=CLIENT_IMPORT_REJECTED_RETENTION_HOURS)
+        )
+        rejected_name = f"{self.request.user.pk}-{uuid4().hex}"
+        rejected_path = rejected_dir / f"{rejected_name}.csv"
+        rows = io.TextIOWrapper(
+            form.cleaned_data["file"].file, encoding="utf-8-sig", newline=""
+        )
+        # Пачки сохраняются по мере чтения; при ошибке в середине файла
+        # сообщаем, сколько клиентов уже создано
+        imported = {}
+        try:
+            with open(rejected_path, "w", encoding="utf-8", newline="") as rejected:
+                report = import_clients(
+                    self.request.user,
+                    rows,
+                    rejected=csv.writer(rejected),
+                    progress=imported.update,
+                )
+        except (ValueError, csv.Error) as e:
+            rejected_path.unlink(missing_ok=True)
+            if isinstance(e, UnicodeDecodeError):
+                error = "Файл должен быть в кодировке UTF-8"
+            elif isinstance(e, csv.Error):
+                error = f"Некорректный CSV: {e}"
+            else:
+                error = str(e)
+            if imported.get("created"):
+                error += f". До ошибки создано клиентов: {imported['created']}"
+            form.add_error("file", error)
+            return self.form_invalid(form)
+        if not report["duplicate"] and not report["invalid"]:
+            rejected_path.unlink()
+            rejected_name = None
+        return self.render_to_response(
+            self.get_context_data(
+                form=self.form_class(), report=report, rejected_name=rejected_name
+            )
+        )
+
+
+class ClientImportRejectedView(LoginRequiredMixin, View):
+    """Файл с отклоненными строками импорта; доступен только загрузившему"""
+
+    def get(self, request, name):
+        if not name.startswith(f"{request.user.pk}-"):
+            raise Http404
+        path = Path(CLIENT_IMPORT_REJECTED_DIR) / f"{name}.csv"
+        if not path.is_file():
+            raise Http404
+        return FileResponse(
+            open(path, "rb"), as_attachment=True, filename="rejected_clients.csv"
+        )
+
+
+class SegmentListView(OwnedListView):
+    model = Segment
+    template_name = "mailing/segments_all.html"
+    context_object_name = "segments"
+
+
+class SegmentCreateView(LoginRequiredMixin, CreateView):
+    model = Segment
+    form_class = SegmentForm
+    template_name = "mailing/segment_add.html"
+    success_url = reverse_lazy("mailing:segments_all")
+
+    def form_valid(self, form):
+        form.instance.owner = self.request.user
+        return super().form_valid(form)
+
+
+class SegmentUpdateView(LoginRequiredMixin, UpdateView):
+    model = Segment
+    form_class = SegmentForm
+    template_name = "mailing/segment_add.html"
+    success_url = reverse_lazy("mailing:segments_all")
+
+    def get_queryset(self):
+        return Segment.objects.owned_by(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["clients_count"] = Client.objects.filter(
+            self.object.get_filter()
+        ).count()
+        return context
+
+
+class SegmentDeleteView(LoginRequiredMixin, DeleteView):
+    model = Segment
+    template_name = "mailing/segment_delete.html"
+    success_url = reverse_lazy("mailing:segments_all")
+
+    def get_queryset(self):
+        return Segment.objects.owned_by(self.request.user)
+
+    def form_valid(self, form):
+        try:
+            return super().form_valid(form)
+        except ProtectedError:
+            return self.render_to_response(
+                self.get_context_data(
+                    error="Сегмент используется в рассылках, сначала уберите его из них"
+                )
+            )
+
+
+class MailingListView(OwnedListView):
     model = Mailing
     template_name = "mailing/mailings_all.html"
     context_object_name = "mailings"
 
-    def get_queryset(self, *args, **kwargs):
-        if self.request.user.groups.filter(name='managers') or self.request.user.is_superuser:
-            return Mailing.objects.order_by("-pk")
-        return get_list_by_owner(self.request.user.id, Mailing).order_by("-pk")
-
 
-@method_decorator(cache_page(60 * 15), name="dispatch")
-class MailingDetailView(LoginRequiredMixin, DetailView):
+class MailingDetailView(LoginRequiredMixin, VersionedCacheMixin, DetailView):
     model = Mailing
     template_name = "mailing/mailing_details.html"
     context_object_name = "mailing"
 
     def get_queryset(self):
-        return get_list_by_owner(self.request.user.id, Mailing).order_by("-pk")
+        return Mailing.objects.owned_by(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["stats"] = get_mailing_stats(self.object.pk)
+        return context
 
 
 class MailingCreateView(LoginRequiredMixin, CreateView):
@@ -194,6 +391,7 @@ class MailingCreateView(LoginRequiredMixin, CreateView):
         mailing = form.save()
         user = self.request.user
         mailing.owner = user
+        schedule_mailing(mailing, timezone.now())
         mailing.save()
         return super().form_valid(form)
 
@@ -209,6 +407,11 @@ class MailingUpdateView(LoginRequiredMixin, UpdateView):
         kwargs.update({"user": self.request.user})
         return kwargs
 
+    def form_valid(self, form):
+        if {"period_mail", "finished_at"} & set(form.changed_data):
+            schedule_mailing(form.instance, timezone.now())
+        return super().form_valid(form)
+
 
 class MailingDeleteView(LoginRequiredMixin, DeleteView):
     model = Mailing
@@ -226,7 +429,11 @@ class MailingDeleteView(LoginRequiredMixin, DeleteView):
 
 
 class MailingSendMail(LoginRequiredMixin, View):
-    """Класс для отправки писем пользователям"""
+    """Класс для отправки писем пользователям.
+
+    Письма не отправляются и не раздаются внутри запроса: рассылке назначается
+    запуск, который забирает планировщик send_mail.
+    """
 
     model = Mailing
     template_name = "mailing/newsletter/mailing_details.html"
@@ -234,23 +441,23 @@ class MailingSendMail(LoginRequiredMixin, View):
 
     def post(self, request, pk):
         mailing = get_object_or_404(Mailing, id=pk)
+        if not request.user == mailing.owner and not is_manager(request.user):
+            raise PermissionDenied
         if mailing.status_mail == "COMPLETED":
             messages.error(
                 request, "Рассылка не может быть инициирована, т.к. была завершена"
             )
         else:
             self.send_email(mailing, request)
-            messages.success(request, "Письма отправлены!")
+            messages.success(request, "Письма поставлены в очередь на отправку!")
 
         return redirect("mailing:mailing_details", pk=pk)
 
     @staticmethod
     def send_email(mailing, request):
-        clients = mailing.clients.all()
         update_status(mailing)
         if mailing.status_mail != "COMPLETED":
-            for client in clients:
-                send_email(mailing, client)
+            request_run(mailing, timezone.now())
         else:
             messages.error(
                 request,
@@ -258,17 +465,112 @@ class MailingSendMail(LoginRequiredMixin, View):
             )
 
 
+class MailingSendMailAsync(View):
+    """Асинхронный вариант MailingSendMail: рассылке так же назначается запуск,
+    а не отправляются письма внутри запроса"""
+
+    async def post(self, request, pk):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        try:
+            mailing = await Mailing.objects.select_related("segment").aget(id=pk)
+        except Mailing.DoesNotExist:
+            raise Http404
+        await aget_user_roles(user)
+        if not user.pk == mailing.owner_id and not is_manager(user):
+            raise PermissionDenied
+        if mailing.status_mail == "COMPLETED":
+            messages.error(
+                request, "Рассылка не может быть инициирована, т.к. была завершена"
+            )
+        else:
+            await sync_to_async(MailingSendMail.send_email)(mailing, request)
+            messages.success(request, "Письма поставлены в очередь на отправку!")
+        return redirect("mailing:mailing_details", pk=pk)
+
+
+class MailingProgressView(LoginRequiredMixin, View):
+    """Ход фоновой отправки рассылки в JSON: в очереди / отправлено / не отправлено"""
+
+    def get(self, request, pk):
+        mailing = get_object_or_404(Mailing, id=pk)
+        if not request.user == mailing.owner and not is_manager(request.user):
+            raise PermissionDenied
+        return JsonResponse(get_outbox_progress(mailing))
+
+
+class MailingStatsView(LoginRequiredMixin, View):
+    """Статистика рассылки по дням в JSON (из MailingDailyStats)"""
+
+    def get(self, request, pk):
+        mailing = get_object_or_404(Mailing, id=pk)
+        if not request.user == mailing.owner and not is_manager(request.user):
+            raise PermissionDenied
+        return JsonResponse(get_mailing_stats(mailing.pk))
+
+
 class LogsView(LoginRequiredMixin, ListView):
     model = AttemptToSend
     template_name = "mailing/logs.html"
     context_object_name = "logs"
 
+    page_size = 50
+
+    def get_filter_form(self):
+        return LogsFilterForm(self.request.GET or None, user=self.request.user)
+
     def get_queryset(self, *args, **kwargs):
-        queryset = super().get_queryset()
-        if self.request.user.groups.filter(name='managers') or self.request.user.is_superuser:
-            return queryset.order_by("-pk")
-        queryset = queryset.filter(mailing_list__owner=self.request.user)
-        return queryset.order_by("-pk")
+        queryset = AttemptToSend.objects.select_related(
+            "client", "mailing_list"
+        ).only(
+            "client__initials",
+            "mailing_list__title",
+            "status_log",
+            "time_log_send",
+            "server_response",
+        )
+        if not is_manager(self.request.user):
+            queryset = queryset.filter(mailing_list__owner=self.request.user)
+        self.filter_form = self.get_filter_form()
+        queryset = self.filter_form.filter_queryset(queryset)
+        cursor = decode_log_cursor(self.request.GET.get("after"))
+        return seek_logs(queryset, cursor)[: self.page_size + 1]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        logs = list(context["logs"])
+        params = self.request.GET.copy()
+        params.pop("after", None)
+        context["filter_form"] = self.filter_form
+        context["first_page_query"] = params.urlencode()
+        if len(logs) > self.page_size:
+            logs = logs[: self.page_size]
+            params["after"] = encode_log_cursor(logs[-1])
+            context["next_page_query"] = params.urlencode()
+        context["logs"] = context["object_list"] = logs
+        return context
+
+
+class LogsExportView(LoginRequiredMixin, View):
+    """Потоковая выгрузка журнала попыток в CSV с теми же фильтрами, что в LogsView"""
+
+    def get(self, request):
+        queryset = AttemptToSend.objects.all()
+        if not is_manager(request.user):
+            queryset = queryset.filter(mailing_list__owner=request.user)
+        form = LogsFilterForm(request.GET or None, user=request.user)
+        if form.is_bound and not form.is_valid():
+            return HttpResponseBadRequest("Некорректные параметры фильтра")
+        response = StreamingHttpResponse(
+            iter_csv(
+                ["time", "mailing", "email", "status", "server_response"],
+                export_logs(form.filter_queryset(queryset)),
+            ),
+            content_type="text/csv; charset=utf-8",
+        )
+        response["Content-Disposition"] = 'attachment; filename="logs.csv"'
+        return response
 
 
 class DisableMailingView(LoginRequiredMixin, View):
@@ -284,6 +586,7 @@ class DisableMailingView(LoginRequiredMixin, View):
 
         if mailing.status_mail == "COMPLETED":
             mailing.status_mail = "STARTED"
+            schedule_mailing(mailing, timezone.now())
         else:
             mailing.status_mail = "COMPLETED"
 
@@ -3,9 +3,11 @@ from django.contrib.auth import password_validation
 from django.contrib.auth.forms import (AuthenticationForm, PasswordResetForm,
                                        SetPasswordForm, UserChangeForm,
                                        UserCreationForm)
+from django.template import loader
 from phonenumber_field.formfields import PhoneNumberField
 
 from mailing.forms import StyleFormMixin
+from mailing.services import enqueue_email
 
 from .models import User
 
@@ -62,6 +64,24 @@ class UserForgotPasswordForm(PasswordResetForm):
         ),
     )
 
+    def send_mail(
+        self,
+        subject_template_name,
+        email_template_name,
+        context,
+        from_email,
+        to_email,
+        html_email_template_name=None,
+    ):
+        """Ставит письмо со ссылкой сброса в очередь вместо отправки в запросе"""
+        subject = loader.render_to_string(subject_template_name, context)
+        subject = "".join(subject.splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        html_body = ""
+        if html_email_template_name is not None:
+            html_body = loader.render_to_string(html_email_template_name, context)
+        enqueue_email(subject, body, to_email, from_email, html_body)
+
 
 class UserSetNewPasswordForm(SetPasswordForm):
     """
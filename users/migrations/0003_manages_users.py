@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:18
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+def backfill_manages_users(apps, schema_editor):
+    """Отмечает пользователей, чьи группы дают право блокировать пользователей"""
+    User = apps.get_model("users", "User")
+    User.objects.filter(
+        groups__permissions__content_type__app_label="users",
+        groups__permissions__codename="can_block_users",
+    ).update(manages_users=True)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0002_alter_user_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="manages_users",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                help_text="Вычисляется по правам групп пользователя (users.signals)",
+                verbose_name="Может блокировать пользователей",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_superuser", False), ("manages_users", False)),
+                fields=["-is_active", "-id"],
+                name="user_list_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_manages_users, migrations.RunPython.noop),
+    ]
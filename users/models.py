@@ -32,6 +32,12 @@ class User(AbstractUser):
     token = models.CharField(
         max_length=100, verbose_name="Token", blank=True, null=True
     )
+    manages_users = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name="Может блокировать пользователей",
+        help_text="Вычисляется по правам групп пользователя (users.signals)",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
@@ -42,6 +48,14 @@ class User(AbstractUser):
         permissions = [
             ("can_block_users", "Сan block users"),
         ]
+        indexes = [
+            # Список пользователей: обычные пользователи, активные первыми
+            models.Index(
+                fields=["-is_active", "-id"],
+                condition=models.Q(is_superuser=False, manages_users=False),
+                name="user_list_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.username
@@ -0,0 +1,109 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from users.models import User
+
+MANAGERS_GROUP = "managers"
+BLOCK_USERS_PERMISSION = "can_block_users"
+BLOCKING_GROUPS_CACHE_KEY = "users:blocking_groups"
+
+
+def get_user_roles(user):
+    """Названия групп пользователя.
+
+    Вычисляются одним запросом и кешируются на объекте пользователя, поэтому
+    все проверки ролей в пределах запроса (во view и в шаблоне) бесплатны.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, "_roles_cache", None)
+    if roles is None:
+        roles = frozenset(user.groups.values_list("name", flat=True))
+        user._roles_cache = roles
+    return roles
+
+
+async def aget_user_roles(user):
+    """Асинхронный вариант get_user_roles; заполняет тот же кеш на объекте"""
+    if not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, "_roles_cache", None)
+    if roles is None:
+        roles = frozenset(
+            [name async for name in user.groups.values_list("name", flat=True)]
+        )
+        user._roles_cache = roles
+    return roles
+
+
+def is_manager(user):
+    """Видит ли пользователь данные всех владельцев (менеджер или суперпользователь)"""
+    return user.is_superuser or MANAGERS_GROUP in get_user_roles(user)
+
+
+def get_blocking_groups():
+    """Группы, дающие право блокировать пользователей.
+
+    Карта прав кешируется без срока: сигналы (users.signals) сбрасывают ее при
+    изменении прав групп.
+    """
+    group_ids = cache.get(BLOCKING_GROUPS_CACHE_KEY)
+    if group_ids is None:
+        group_ids = frozenset(
+            Group.objects.filter(
+                permissions__content_type__app_label="users",
+                permissions__codename=BLOCK_USERS_PERMISSION,
+            ).values_list("pk", flat=True)
+        )
+        cache.set(BLOCKING_GROUPS_CACHE_KEY, group_ids, None)
+    return group_ids
+
+
+def invalidate_blocking_groups():
+    cache.delete(BLOCKING_GROUPS_CACHE_KEY)
+
+
+def refresh_manages_users(user_ids=None):
+    """Пересчитывает флаг manages_users одним UPDATE (для всех, если user_ids=None)"""
+    queryset = User.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(pk__in=user_ids)
+    group_ids = get_blocking_groups()
+    if not group_ids:
+        return queryset.update(manages_users=False)
+    memberships = User.groups.through.objects.filter(
+        user_id=OuterRef("pk"), group_id__in=group_ids
+    )
+    return queryset.update(manages_users=Exists(memberships))
+
+
+def encode_user_cursor(user):
+    """Курсор постраничного вывода пользователей: активность и pk"""
+    return f"{int(user.is_active)}_{user.pk}"
+
+
+def decode_user_cursor(value):
+    """Разбирает курсор списка пользователей, для некорректного значения - None"""
+    try:
+        is_active, pk = (int(part) for part in value.split("_"))
+    except (AttributeError, ValueError):
+        return None
+    return bool(is_active), pk
+
+
+def get_users_page(queryset, cursor, limit):
+    """Страница пользователей после курсора в порядке (-is_active, -pk).
+
+    Keyset-пагинация: каждая выборка - равенство по is_active и диапазон pk,
+    то есть просмотр диапазона индекса, поэтому любая страница стоит одинаково.
+    После активных пользователей страница дополняется неактивными.
+    """
+    queryset = queryset.order_by("-is_active", "-pk")
+    if cursor is None:
+        return list(queryset[:limit])
+    is_active, pk = cursor
+    page = list(queryset.filter(is_active=is_active, pk__lt=pk)[:limit])
+    if is_active and len(page) < limit:
+        page += list(queryset.filter(is_active=False)[: limit - len(page)])
+    return page
@@ -0,0 +1,37 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from users.models import User
+from users.services import invalidate_blocking_groups, refresh_manages_users
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def update_user_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересчитывает флаг manages_users пользователей, чьи группы изменились"""
+    if reverse and action == "pre_clear":
+        instance._cleared_user_ids = list(
+            instance.user_set.values_list("pk", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        refresh_manages_users([instance.pk])
+    elif action == "post_clear":
+        refresh_manages_users(instance._cleared_user_ids)
+    else:
+        refresh_manages_users(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def update_group_permissions(sender, action, **kwargs):
+    """Права групп меняются редко: сбрасываем карту и пересчитываем всех"""
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_blocking_groups()
+        refresh_manages_users()
+
+
+@receiver(post_delete, sender=Group)
+def update_deleted_group(sender, instance, **kwargs):
+    invalidate_blocking_groups()
+    refresh_manages_users()
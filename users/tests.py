@@ -0,0 +1,151 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, Group, Permission
+from django.core import mail
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from mailing.models import QueuedEmail
+from mailing.templatetags.my_tags import has_group
+from users.models import User
+from users.services import (MANAGERS_GROUP, aget_user_roles,
+                            decode_user_cursor, encode_user_cursor,
+                            get_user_roles, get_users_page, is_manager)
+
+
+class UserRolesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username="manager", email="m@example.com")
+        cls.manager.groups.add(Group.objects.create(name=MANAGERS_GROUP))
+
+    def setUp(self):
+        self.user = User.objects.get(pk=self.manager.pk)
+
+    def test_roles_are_queried_once_per_user_object(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_roles(self.user), {MANAGERS_GROUP})
+            self.assertTrue(is_manager(self.user))
+            self.assertTrue(has_group(self.user, MANAGERS_GROUP))
+
+    def test_async_variant_fills_same_cache(self):
+        self.assertEqual(async_to_sync(aget_user_roles)(self.user), {MANAGERS_GROUP})
+        with self.assertNumQueries(0):
+            self.assertTrue(is_manager(self.user))
+
+    def test_anonymous_user_has_no_roles(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_roles(AnonymousUser()), frozenset())
+
+
+class UserCursorTest(SimpleTestCase):
+    def test_round_trip(self):
+        for is_active in (True, False):
+            with self.subTest(is_active=is_active):
+                user = User(pk=7, is_active=is_active)
+                self.assertEqual(
+                    decode_user_cursor(encode_user_cursor(user)), (is_active, 7)
+                )
+
+    def test_invalid_values(self):
+        for value in [None, "", "abc", "1", "1_2_3", "x_1", "1_x"]:
+            with self.subTest(value=value):
+                self.assertIsNone(decode_user_cursor(value))
+
+
+class UsersPageTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(
+                username=f"user{index}",
+                email=f"u{index}@example.com",
+                is_active=index % 3 != 0,
+            )
+            for index in range(10)
+        )
+
+    def test_pages_cover_users_once_active_first(self):
+        seen = []
+        cursor = None
+        while True:
+            page = get_users_page(User.objects.all(), cursor, 3)
+            seen += page
+            if len(page) < 3:
+                break
+            cursor = decode_user_cursor(encode_user_cursor(page[-1]))
+        self.assertEqual(seen, list(User.objects.order_by("-is_active", "-pk")))
+
+
+class ManagesUsersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user", email="u@example.com")
+        cls.group = Group.objects.create(name="moderators")
+        cls.permission = Permission.objects.get(
+            content_type__app_label="users", codename="can_block_users"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def manages_users(self):
+        return User.objects.get(pk=self.user.pk).manages_users
+
+    def test_flag_follows_groups(self):
+        self.group.permissions.add(self.permission)
+        self.user.groups.add(self.group)
+        self.assertTrue(self.manages_users())
+        self.group.user_set.clear()
+        self.assertFalse(self.manages_users())
+
+    def test_flag_follows_group_permissions(self):
+        self.user.groups.add(self.group)
+        self.assertFalse(self.manages_users())
+        self.group.permissions.add(self.permission)
+        self.assertTrue(self.manages_users())
+        self.group.delete()
+        self.assertFalse(self.manages_users())
+
+    def test_user_list_hides_managers(self):
+        self.group.permissions.add(self.permission)
+        self.user.groups.add(self.group)
+        viewer = User.objects.create(username="viewer", email="v@example.com")
+        viewer.user_permissions.add(Permission.objects.get(codename="view_user"))
+        self.client.force_login(viewer)
+        response = self.client.get(reverse("users:users_list"))
+        self.assertEqual(list(response.context["users"]), [viewer])
+
+
+class ServiceMailTest(TestCase):
+    def register(self):
+        return self.client.post(
+            reverse("users:register"),
+            {
+                "email": "new@example.com",
+                "username": "new",
+                "password1": "Sl0zhny-parol",
+                "password2": "Sl0zhny-parol",
+            },
+        )
+
+    def test_registration_mail_is_queued_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.register()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        item = QueuedEmail.objects.get()
+        self.assertEqual(item.to, "new@example.com")
+        self.assertIn(User.objects.get(username="new").token, item.body)
+
+    def test_verification_and_password_reset_are_queued(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.register()
+        token = User.objects.get(username="new").token
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("users:email-confirm", args=[token]))
+            self.client.post(
+                reverse("users:password-reset"), {"email": "new@example.com"}
+            )
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(QueuedEmail.objects.count(), 3)
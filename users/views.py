@@ -5,18 +5,20 @@ from django.contrib.auth.mixins import (LoginRequiredMixin,
 from django.contrib.auth.views import (LoginView, PasswordResetConfirmView,
                                        PasswordResetView)
 from django.core.exceptions import PermissionDenied
-from django.core.mail import send_mail
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
 from django.views import View
 from django.views.generic import DetailView, ListView
 from django.views.generic.edit import CreateView, UpdateView
 
-from config.settings import EMAIL_HOST_USER
+from config.settings import EMAIL_HOST_USER, LIST_PAGE_SIZE
+from mailing.services import enqueue_email
 
 from .forms import (UserForgotPasswordForm, UserLoginForm, UserRegisterForm,
                     UserSetNewPasswordForm, UserUpdateForm)
 from .models import User
+from .services import decode_user_cursor, encode_user_cursor, get_users_page
 
 
 class RegisterView(CreateView):
@@ -24,6 +26,7 @@ class RegisterView(CreateView):
     form_class = UserRegisterForm
     success_url = reverse_lazy("users:login")
 
+    @transaction.atomic
     def form_valid(self, form):
         user = form.save()
         user.is_active = False
@@ -32,21 +35,19 @@ class RegisterView(CreateView):
         user.save()
         host = self.request.get_host()
         url = f"http://{host}/users/email-confirm/{token}/"
-        send_mail(
+        enqueue_email(
             "Подтверждение почты",
             f"Привет! Перейди по ссылке для подтверждения почты {url}",
-            EMAIL_HOST_USER,
-            [user.email],
+            user.email,
         )
         return super().form_valid(form)
 
 
 def send_welcome_email(user_email):
-    send_mail(
+    enqueue_email(
         "Добро пожаловать в менеджер рассылок!",
-        f"Спасибо, что зарегистрировались!",
-        f"{EMAIL_HOST_USER}",
-        [user_email],
+        "Спасибо, что зарегистрировались!",
+        user_email,
     )
 
 
@@ -70,11 +71,23 @@ class UserListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     context_object_name = "users"
     permission_required = "users.view_user"
 
+    page_size = LIST_PAGE_SIZE
+
     def get_queryset(self, *args, **kwargs):
-        queryset = super().get_queryset()
-        queryset = queryset.filter(is_superuser=False)
-        queryset = queryset.exclude(groups__permissions__codename="can_block_users")
-        return queryset.order_by("-is_active")
+        queryset = User.objects.filter(is_superuser=False, manages_users=False).only(
+            "username", "email", "phone_number", "is_active"
+        )
+        cursor = decode_user_cursor(self.request.GET.get("after"))
+        return get_users_page(queryset, cursor, self.page_size + 1)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        users = context["users"]
+        if len(users) > self.page_size:
+            users = users[: self.page_size]
+            context["next_cursor"] = encode_user_cursor(users[-1])
+        context["users"] = context["object_list"] = users
+        return context
 
 
 class BlockUserView(LoginRequiredMixin, View):